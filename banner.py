@@ -0,0 +1,101 @@
+from functools import lru_cache
+
+# Text banners: a 5×7 bitmap font (one row per weekday, Sun..Sat) laid out across week columns.
+# Glyphs are turned into per-column bitmasks once and cached; a string is composed into a set of
+# (y, x) cells in one pass, which the caller applies to the grid in one step.
+
+GLYPH_ROWS = 7
+ALIGNS = ("left", "center", "right")
+
+FONT = {
+    "A": (".###.", "#...#", "#...#", "#####", "#...#", "#...#", "#...#"),
+    "B": ("####.", "#...#", "#...#", "####.", "#...#", "#...#", "####."),
+    "C": (".###.", "#...#", "#....", "#....", "#....", "#...#", ".###."),
+    "D": ("####.", "#...#", "#...#", "#...#", "#...#", "#...#", "####."),
+    "E": ("#####", "#....", "#....", "####.", "#....", "#....", "#####"),
+    "F": ("#####", "#....", "#....", "####.", "#....", "#....", "#...."),
+    "G": (".###.", "#...#", "#....", "#.###", "#...#", "#...#", ".####"),
+    "H": ("#...#", "#...#", "#...#", "#####", "#...#", "#...#", "#...#"),
+    "I": ("###", ".#.", ".#.", ".#.", ".#.", ".#.", "###"),
+    "J": ("..###", "...#.", "...#.", "...#.", "...#.", "#..#.", ".##.."),
+    "K": ("#...#", "#..#.", "#.#..", "##...", "#.#..", "#..#.", "#...#"),
+    "L": ("#....", "#....", "#....", "#....", "#....", "#....", "#####"),
+    "M": ("#...#", "##.##", "#.#.#", "#.#.#", "#...#", "#...#", "#...#"),
+    "N": ("#...#", "#...#", "##..#", "#.#.#", "#..##", "#...#", "#...#"),
+    "O": (".###.", "#...#", "#...#", "#...#", "#...#", "#...#", ".###."),
+    "P": ("####.", "#...#", "#...#", "####.", "#....", "#....", "#...."),
+    "Q": (".###.", "#...#", "#...#", "#...#", "#.#.#", "#..#.", ".##.#"),
+    "R": ("####.", "#...#", "#...#", "####.", "#.#..", "#..#.", "#...#"),
+    "S": (".####", "#....", "#....", ".###.", "....#", "....#", "####."),
+    "T": ("#####", "..#..", "..#..", "..#..", "..#..", "..#..", "..#.."),
+    "U": ("#...#", "#...#", "#...#", "#...#", "#...#", "#...#", ".###."),
+    "V": ("#...#", "#...#", "#...#", "#...#", "#...#", ".#.#.", "..#.."),
+    "W": ("#...#", "#...#", "#...#", "#.#.#", "#.#.#", "#.#.#", ".#.#."),
+    "X": ("#...#", "#...#", ".#.#.", "..#..", ".#.#.", "#...#", "#...#"),
+    "Y": ("#...#", "#...#", ".#.#.", "..#..", "..#..", "..#..", "..#.."),
+    "Z": ("#####", "....#", "...#.", "..#..", ".#...", "#....", "#####"),
+    "0": (".###.", "#...#", "#..##", "#.#.#", "##..#", "#...#", ".###."),
+    "1": (".#.", "##.", ".#.", ".#.", ".#.", ".#.", "###"),
+    "2": (".###.", "#...#", "....#", "...#.", "..#..", ".#...", "#####"),
+    "3": ("#####", "...#.", "..#..", "...#.", "....#", "#...#", ".###."),
+    "4": ("...#.", "..##.", ".#.#.", "#..#.", "#####", "...#.", "...#."),
+    "5": ("#####", "#....", "####.", "....#", "....#", "#...#", ".###."),
+    "6": ("..##.", ".#...", "#....", "####.", "#...#", "#...#", ".###."),
+    "7": ("#####", "....#", "...#.", "..#..", ".#...", ".#...", ".#..."),
+    "8": (".###.", "#...#", "#...#", ".###.", "#...#", "#...#", ".###."),
+    "9": (".###.", "#...#", "#...#", ".####", "....#", "...#.", ".##.."),
+    " ": ("...", "...", "...", "...", "...", "...", "..."),
+    ".": (".", ".", ".", ".", ".", ".", "#"),
+    ",": ("..", "..", "..", "..", "..", ".#", "#."),
+    "!": ("#", "#", "#", "#", "#", ".", "#"),
+    "?": (".###.", "#...#", "....#", "...#.", "..#..", ".....", "..#.."),
+    ":": (".", ".", "#", ".", "#", ".", "."),
+    "'": ("#", "#", ".", ".", ".", ".", "."),
+    "-": ("...", "...", "...", "###", "...", "...", "..."),
+    "+": (".....", "..#..", "..#..", "#####", "..#..", "..#..", "....."),
+    "/": ("....#", "....#", "...#.", "..#..", ".#...", "#....", "#...."),
+    "#": (".#.#.", ".#.#.", "#####", ".#.#.", "#####", ".#.#.", ".#.#."),
+    "<": ("...#", "..#.", ".#..", "#...", ".#..", "..#.", "...#"),
+    ">": ("#...", ".#..", "..#.", "...#", "..#.", ".#..", "#..."),
+    "=": ("...", "...", "###", "...", "###", "...", "..."),
+    "_": ("....", "....", "....", "....", "....", "....", "####"),
+    "*": (".....", "#.#.#", ".###.", "#####", ".###.", "#.#.#", "....."),
+    "♥": (".....", ".#.#.", "#####", "#####", ".###.", "..#..", "....."),
+}
+
+def supported(ch: str) -> bool:
+    return ch.upper() in FONT
+
+@lru_cache(maxsize=None)
+def glyph(ch: str):
+    # column bitmasks (bit y = weekday row y) of a character; unknown characters render as '?'
+    rows = FONT.get(ch.upper(), FONT["?"])
+    return tuple(sum(1 << y for y in range(GLYPH_ROWS) if rows[y][x] == "#") for x in range(len(rows[0])))
+
+def _gap(left: int, right: int) -> bool:
+    # can two facing columns sit side by side without touching (not even diagonally)?
+    return not (left & (right | right << 1 | right >> 1))
+
+@lru_cache(maxsize=4096)
+def layout(text: str, spacing: int = 1, kerning: bool = True):
+    # column bitmasks of the whole string; with kerning the spacing column goes away between glyphs whose
+    # facing edges can't touch (e.g. "T." or "L-")
+    cols = []
+    for ch in text:
+        g = glyph(ch)
+        if cols:
+            pad = spacing
+            if kerning and pad and ch != " " and cols[-1] and _gap(cols[-1], g[0]): pad -= 1
+            cols.extend([0] * pad)
+        cols.extend(g)
+    return tuple(cols)
+
+def text_cells(text: str, width: int, align: str = "center", spacing: int = 1, kerning: bool = True, offset: int = 0):
+    # (y, x) cells of `text` placed in columns [offset, offset+width); returns (cells, clipped)
+    if align not in ALIGNS: raise ValueError(f"unknown alignment: {align}")
+    cols = layout(text, spacing, kerning)
+    start = {"left": 0, "center": (width - len(cols)) // 2, "right": width - len(cols)}[align]
+    start = max(0, start)
+    cells = [(y, offset + start + i) for i, mask in enumerate(cols[:width - start]) if mask
+             for y in range(GLYPH_ROWS) if mask >> y & 1]
+    return cells, len(cols) > width
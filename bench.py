@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import datetime as dt
+from itertools import product
+from git import Repo
+from core import ROWS, COLS, CONTENT_MODES, calc_range_for_year, empty_grid, Density, PixelJob
+
+# Benchmark: the real pipeline against a throwaway work repo + a local bare repo as `origin`.
+#
+#   python bench.py                                   # default sweep, table on stdout
+#   python bench.py --fills full --levels 4 --lv-counts 1,3,6,10 5,10,20,40 --out bench.json
+#
+# Every case gets fresh repos; results (commits/s, push time, repo size, …) go to --out as JSON
+# so runs of different backends / revisions can be diffed.
+# `python bench.py --check` runs the consistency checks instead (exit status 1 if one fails).
+
+FILLS = ("empty", "sparse", "full")
+SPARSE_RATIO = 0.15
+
+def make_grid(fill: str, level: int, seed: int = 0):
+    grid = empty_grid()
+    if fill == "empty": return grid
+    rng = random.Random(seed)
+    for y in range(ROWS):
+        for x in range(COLS):
+            if fill == "full" or rng.random() < SPARSE_RATIO: grid[y][x] = level
+    return grid
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try: total += os.path.getsize(os.path.join(root, f))
+            except OSError: pass
+    return total
+
+class Timed:
+    # wraps a bound method, summing wall time and call count (safe across the pipeline's threads)
+    def __init__(self, fn):
+        self.fn, self.seconds, self.calls, self.lock = fn, 0.0, 0, threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        t0 = time.perf_counter()
+        try: return self.fn(*args, **kwargs)
+        finally:
+            with self.lock: self.seconds += time.perf_counter() - t0; self.calls += 1
+
+def run_case(workdir: str, fill: str, level: int, lv_counts: str, backend: str, safe_mode: bool,
+             content: str, batch_weeks: int, seed: int, repack: bool = True):
+    tmp = tempfile.mkdtemp(prefix="case-", dir=workdir)
+    try:
+        origin, work = os.path.join(tmp, "origin.git"), os.path.join(tmp, "work")
+        Repo.init(origin, bare=True); Repo.init(work)
+        job = PixelJob(work, origin, None, make_grid(fill, level, seed), calc_range_for_year(2024)[0],
+                       Density.from_spec(lv_counts), name="bench", email="bench@example.com",
+                       safe_mode=safe_mode, batch_weeks=batch_weeks, batch_delay=0,
+                       fast_import=(backend == "fast-import"), content_mode=content, seed=seed,
+                       repack=repack)
+        job.make_commits = commit_t = Timed(job.make_commits)
+        job.push = push_t = Timed(job.push)
+        t0 = time.perf_counter()
+        commits = job.run()
+        wall = time.perf_counter() - t0
+        return {"fill": fill, "level": level, "lv_counts": lv_counts, "backend": backend,
+                "safe_mode": safe_mode, "content": content, "batch_weeks": batch_weeks, "repack": repack,
+                "commits": commits, "wall_s": round(wall, 3),
+                "commit_s": round(commit_t.seconds, 3), "push_s": round(push_t.seconds, 3), "pushes": push_t.calls,
+                "commits_per_s": round(commits / commit_t.seconds, 1) if commits and commit_t.seconds else None,
+                "local_git_bytes": dir_size(os.path.join(work, ".git")), "origin_bytes": dir_size(origin)}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def check_delta_rerun(workdir: str, runs: int = 3) -> str:
+    # range-mode delta runs without a seed draw new counts each time; after the first, none may add commits
+    tmp = tempfile.mkdtemp(prefix="check-", dir=workdir)
+    try:
+        origin, work = os.path.join(tmp, "origin.git"), os.path.join(tmp, "work")
+        Repo.init(origin, bare=True); Repo.init(work)
+        added = []
+        for _ in range(runs):
+            job = PixelJob(work, origin, None, make_grid("sparse", 4), calc_range_for_year(2024)[0],
+                           Density.from_spec(range_="2-20"), name="bench", email="bench@example.com",
+                           safe_mode=False, journal=False, delta=True)
+            job.run()
+            added.append(job.counter["total"] - job.counter["base"])
+        if any(added[1:]): return f"delta reruns added commits: {added}"
+        return ""
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+CHECKS = {"delta-rerun": check_delta_rerun}
+
+def git_version() -> str:
+    try: return subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip()
+    except OSError: return "unknown"
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="bench.py", description="Benchmark the commit/push pipeline against a local bare origin.")
+    p.add_argument("--fills", nargs="+", choices=FILLS, default=list(FILLS))
+    p.add_argument("--levels", nargs="+", type=int, choices=range(1, 5), default=[1, 4], help="grid level painted")
+    p.add_argument("--lv-counts", nargs="+", default=["1,3,6,10"], help="fixed commits per level L1..L4")
+    p.add_argument("--backends", nargs="+", choices=("fast-import", "per-commit"), default=["fast-import", "per-commit"])
+    p.add_argument("--safe-mode", nargs="+", choices=("on", "off"), default=["on", "off"])
+    p.add_argument("--contents", nargs="+", choices=CONTENT_MODES, default=["rotate"])
+    p.add_argument("--repack", nargs="+", choices=("on", "off"), default=["on"], help="pack loose objects before each push")
+    p.add_argument("--batch-weeks", type=int, default=4)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--workdir", help="where the throwaway repos go (default: system temp)")
+    p.add_argument("--out", help="write results as JSON here")
+    p.add_argument("--check", action="store_true", help="run the consistency checks instead of the sweep")
+    args = p.parse_args(argv)
+
+    if args.workdir: os.makedirs(args.workdir, exist_ok=True)
+    workdir = tempfile.mkdtemp(prefix="pixel-bench-", dir=args.workdir)
+    if args.check:
+        try:
+            failed = 0
+            for name, check in CHECKS.items():
+                error = check(workdir)
+                print(f"{'FAIL' if error else 'ok  '} {name}" + (f": {error}" if error else ""), flush=True)
+                failed += bool(error)
+            return 1 if failed else 0
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    results = []
+    try:
+        cases = [c for c in product(args.fills, args.levels, args.lv_counts, args.backends, args.safe_mode,
+                                    args.contents, args.repack)
+                 if not (c[0] == "empty" and c[1] != args.levels[0])]    # empty grid: same case whatever the level
+        for n, (fill, level, lv_counts, backend, safe, content, repack) in enumerate(cases, start=1):
+            r = run_case(workdir, fill, level, lv_counts, backend, safe == "on", content, args.batch_weeks, args.seed,
+                         repack == "on")
+            results.append(r)
+            print(f"[{n}/{len(cases)}] {fill:6} L{level} {lv_counts:10} {backend:11} safe={safe:3} {content:6} "
+                  f"repack={repack:3} "
+                  f"{r['commits']:6} commits  commit {r['commit_s']:7.2f}s  push {r['push_s']:6.2f}s ({r['pushes']}×)  "
+                  f"{r['commits_per_s'] or 0:8.1f}/s  origin {r['origin_bytes'] / 1024:8.0f} KiB", flush=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        meta = {"when": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"), "git": git_version(),
+                "python": platform.python_version(), "platform": platform.platform()}
+        with open(args.out, "w", encoding="utf-8") as f: json.dump({"meta": meta, "results": results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,25 @@
-import os
 import time
-import math
-import random
+_T0 = time.perf_counter()                   # --startup-time measures from here
+import os
+import sys
+import json
+import queue
 import threading
 import datetime as dt
+from array import array
+from collections import deque
 import tkinter as tk
-from urllib.parse import quote
 from tkinter import filedialog, messagebox
-from git import Repo
-import requests
+from core import (ROWS, COLS, CONTENT_MODES, calc_range_current, calc_range_for_year, calc_range_span, span_weeks,
+                  period_of, month_label_positions, get_user_login_id, build_noreply_email, create_private_repo,
+                  parse_range, GridStore, Density, PixelJob, PushPacer, save_pattern, read_pattern, share_string,
+                  from_share_string, autosave_path, HistoryCheck)
+from banner import ALIGNS, text_cells
+from shapes import SHAPES, line_cells, rect_cells, flood_cells
+# GitPython, requests, NumPy and Pillow load on first use (repo actions, GitHub calls, push, image import),
+# not before the first window; `python bot.py --startup-time` reports what startup costs
+_T_IMPORTS = time.perf_counter()
+HEAVY_MODULES = ("git", "requests", "numpy", "PIL")
 
 # ===== GitHub-like dark theme =====
 C_BG      = "#0d1117"
@@ -23,53 +34,28 @@ C_SUBTEXT = "#8b949e"
 C_ACCENT  = "#238636"
 C_ACCENT_H= "#2ea043"
 C_DIV     = "#30363d"
+C_SHORT   = "#f85149"       # verify overlay: fewer commits than the drawing needs
+C_EXTRA   = "#d29922"       #                 more commits than it needs
+
+PALETTE = [C_EMPTY, C_LV1, C_LV2, C_LV3, C_LV4]
 
 BTN_W = 26
 
 CELL = 11
 GAP  = 3
-ROWS, COLS = 7, 53
 LEFT_MARGIN = 36
 TOP_MARGIN  = 22
 
 MONTH_LABEL_COLS = 2
 MONTH_LABEL_GAP  = 2
 
-# ===== date helpers =====
-def sunday_of_week(d: dt.date) -> dt.date:
-    return d - dt.timedelta(days=(d.weekday() + 1) % 7)
-
-def saturday_of_week(d: dt.date) -> dt.date:
-    return sunday_of_week(d) + dt.timedelta(days=6)
-
-def calc_range_current():
-    today = dt.date.today()
-    end = saturday_of_week(today)
-    start = sunday_of_week(end) - dt.timedelta(weeks=COLS-1)
-    return start, end
-
-def calc_range_for_year(year: int):
-    last_day = dt.date(year, 12, 31)
-    end = saturday_of_week(last_day)
-    start = sunday_of_week(end) - dt.timedelta(weeks=COLS-1)
-    return start, end
-
-def month_label_positions(start_date: dt.date, end_date: dt.date):
-    labels = []
-    y, m = start_date.year, start_date.month
-    first = dt.date(y, m, 1)
-    if first < start_date:
-        m += 1
-        if m > 12: m = 1; y += 1
-    while True:
-        d = dt.date(y, m, 1)
-        if d > end_date: break
-        x = (d - start_date).days // 7
-        if 0 <= x < COLS:
-            labels.append((x, d.strftime("%b")))
-        m += 1
-        if m > 12: m = 1; y += 1
-    return labels
+# multi-year canvas: COLS weeks are visible at a time; cells exist only for the pages (PAGE_WEEKS columns
+# each) that intersect the view and are created / dropped as it scrolls
+PAGE_WEEKS = COLS
+
+STATUS_REFRESH_MS = 100
+UNDO_LIMIT = 5000           # edits kept for undo
+AUTOSAVE_MS = 1500          # quiet time after the last edit before the drawing is written to autosave_path()
 
 # ===== small UI =====
 def inputbox(root, title, prompt, initial=""):
@@ -84,17 +70,47 @@ def inputbox(root, title, prompt, initial=""):
               activebackground=C_ACCENT_H, bd=0, padx=10, pady=6).pack(pady=(0,12))
     top.bind("<Return>", ok); top.wait_window(); return val["v"]
 
-def api_headers(token: str):
-    return {"Accept":"application/vnd.github+json","Authorization":f"token {token}",
-            "X-GitHub-Api-Version":"2022-11-28","User-Agent":"pixel-art-bot"}
-
-def get_user_login_id(token: str):
-    r = requests.get("https://api.github.com/user", headers=api_headers(token), timeout=15)
-    r.raise_for_status(); j = r.json()
-    return j["login"], j["id"]
-
-def build_noreply_email(login: str, uid: int):
-    return f"{uid}+{login}@users.noreply.github.com"
+# ===== undo / redo =====
+class EditHistory:
+    # one entry per edit (a stroke from press to release, a Clear, an applied image/text): only the cells it
+    # changed, each packed into one uint32 — grid slot (x*ROWS + y) << 6 | old << 3 | new
+    def __init__(self, limit=UNDO_LIMIT):
+        self.undo_stack, self.redo_stack = deque(maxlen=limit), []
+        self.depth, self.open = 0, {}                     # open edit: slot -> [old, new]
+
+    def begin(self):
+        self.depth += 1                                   # nested begins (a stroke during a dialog) join the outer edit
+
+    def record(self, y, x, old, new):
+        if old == new: return
+        cell = self.open.get(x * ROWS + y)
+        if cell: cell[1] = new
+        else: self.open[x * ROWS + y] = [old, new]
+
+    def end(self):
+        if self.depth == 0: return
+        self.depth -= 1
+        if self.depth: return
+        diff = array("I", (slot << 6 | old << 3 | new for slot, (old, new) in self.open.items() if old != new))
+        self.open = {}
+        if diff:
+            self.undo_stack.append(diff); self.redo_stack.clear()
+
+    def clear(self):
+        self.undo_stack.clear(); self.redo_stack.clear()
+        self.depth, self.open = 0, {}
+
+    def step(self, grid, undo=True):
+        # apply the newest undo (or redo) entry to grid; returns the (y, x) cells it touched
+        src, dst = (self.undo_stack, self.redo_stack) if undo else (self.redo_stack, self.undo_stack)
+        if self.depth or not src: return []
+        diff = src.pop(); dst.append(diff)
+        cells = []
+        for code in diff:
+            slot = code >> 6
+            grid.data[slot] = (code >> 3 & 7) if undo else (code & 7)
+            cells.append((slot % ROWS, slot // ROWS))
+        return cells
 
 class App:
     def __init__(self, root):
@@ -112,6 +128,7 @@ class App:
 
         self.year_mode  = tk.StringVar(value="current")
         self.year_value = tk.IntVar(value=dt.date.today().year)
+        self.year_last  = tk.IntVar(value=dt.date.today().year)   # "span" mode: year_value..year_last
         self.start_date = None
         self.end_date   = None
 
@@ -129,15 +146,26 @@ class App:
         self.safe_mode = tk.BooleanVar(value=True)
         self.batch_weeks = tk.IntVar(value=2)
         self.batch_delay = tk.IntVar(value=5)
+        self.adaptive = tk.BooleanVar(value=False)         # batches/cooldown follow push timings; delay = minimum
+        self.max_delay = tk.IntVar(value=60)
+
+        # commit backend: one `git fast-import` stream, or the per-commit add/commit fallback
+        self.fast_import = tk.BooleanVar(value=True)
+        self.content_mode = tk.StringVar(value="rotate")
+        self.delta_mode = tk.BooleanVar(value=False)
 
         # brighten-on-repass
         self.brighten_repass = tk.BooleanVar(value=True)
         self.drag_brighten_active = False
 
-        # grid: 0..4
-        self.grid = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+        # grid: 0..4 per day, date-indexed; as wide as the chosen period
+        self.grid = GridStore.for_range(*calc_range_current())
+        self.history = EditHistory()
 
         self.status_var = tk.StringVar(value="Ready.")
+        # worker -> Tk: status texts and UI calls are queued and drained on the Tk loop
+        self.status_q = queue.SimpleQueue()
+        self.ui_q = queue.SimpleQueue()
         self.step = 1
 
         self.setup_locked = False
@@ -147,6 +175,11 @@ class App:
         self.paint_level = 1
         self.last_cell = None
 
+        # shape tools: "brush" is freehand; line/rect/box preview while dragging, fill acts on click
+        self.tool = tk.StringVar(value="brush")
+        self.tool_level = tk.IntVar(value=4)
+        self.shape = None                                  # (y, x, level) anchor of the shape being dragged
+
         # layout
         self.frame = tk.Frame(root, bg=C_BG); self.frame.pack(fill="both", expand=True)
         self.status = tk.Label(root, textvariable=self.status_var, anchor="w", bg=C_BG, fg=C_SUBTEXT)
@@ -155,7 +188,19 @@ class App:
         self.footer = None
         self.next_btn = None
 
+        self._autosave_job = None
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
+        root.bind("<Control-z>", lambda e: self.undo())
+        root.bind("<Control-y>", lambda e: self.redo())
+        root.bind("<Control-Z>", lambda e: self.redo())             # Ctrl+Shift+Z
+        try:
+            grid, _, density = read_pattern(autosave_path())
+            self.apply_pattern(grid, density); self.set_status("Restored the last drawing.")
+        except (OSError, ValueError):
+            pass
+
         self.render_step1()
+        self._pump()
 
     # ---------- STEP 1 ----------
     def render_step1(self):
@@ -197,7 +242,7 @@ class App:
         self.setup_locked = True
         self.clear_frame(); self.step = 2
         self.titlebar("Step 2 of 3 — Period & Identity")
-        self.subtitle("Pick the 53-week window. Your Git identity is shown below (read-only on this step).")
+        self.subtitle("Pick the 53-week window, or several years painted in one run. Your Git identity is shown below (read-only on this step).")
 
         box = tk.LabelFrame(self.frame, text="Contribution period", bg=C_BG, fg=C_TEXT, bd=1, relief="solid", labelanchor="nw")
         box.configure(highlightbackground=C_DIV); box.pack(fill="x", padx=12, pady=(8,6))
@@ -211,6 +256,16 @@ class App:
         tk.Spinbox(box, from_=2008, to=2100, width=6, textvariable=self.year_value,
                    bg=C_EMPTY, fg=C_TEXT, insertbackground=C_TEXT, relief="solid", bd=1)\
             .grid(row=1, column=1, sticky="w", padx=(6,8))
+        tk.Radiobutton(box, text="Years:", variable=self.year_mode, value="span",
+                       bg=C_BG, fg=C_TEXT, selectcolor=C_BG, activebackground=C_BG)\
+            .grid(row=2, column=0, sticky="w", padx=8, pady=6)
+        tk.Spinbox(box, from_=2008, to=2100, width=6, textvariable=self.year_value,
+                   bg=C_EMPTY, fg=C_TEXT, insertbackground=C_TEXT, relief="solid", bd=1)\
+            .grid(row=2, column=1, sticky="w", padx=(6,4))
+        tk.Label(box, text="to", bg=C_BG, fg=C_SUBTEXT).grid(row=2, column=2, sticky="w")
+        tk.Spinbox(box, from_=2008, to=2100, width=6, textvariable=self.year_last,
+                   bg=C_EMPTY, fg=C_TEXT, insertbackground=C_TEXT, relief="solid", bd=1)\
+            .grid(row=2, column=3, sticky="w", padx=(4,8))
 
         info = tk.LabelFrame(self.frame, text="Git identity (read-only)", bg=C_BG, fg=C_TEXT, bd=1, relief="solid", labelanchor="nw")
         info.configure(highlightbackground=C_DIV); info.pack(fill="x", padx=12, pady=(8,10))
@@ -220,19 +275,38 @@ class App:
 
     # ---------- STEP 3 ----------
     def render_step3(self):
-        if self.year_mode.get() == "current":
+        mode = self.year_mode.get()
+        if mode == "current":
             self.start_date, self.end_date = calc_range_current()
+        elif mode == "span":
+            first, last = sorted((self.year_value.get(), self.year_last.get()))
+            self.start_date, self.end_date = calc_range_span(first, last)
         else:
             self.start_date, self.end_date = calc_range_for_year(self.year_value.get())
+        weeks = span_weeks(self.start_date, self.end_date)
+        if (self.grid.start, self.grid.weeks) != (self.start_date, weeks):
+            self.grid = self.grid.resized(self.start_date, weeks)
+            self.history.clear()
 
         self.clear_frame(); self.step = 3
         self.titlebar("Step 3 of 3 — Draw & Push")
-        self.subtitle("LEFT paints; RIGHT erases. With 'Brighten on re-pass' ON, LMB increases level step-by-step. With it OFF, LMB paints max level.")
+        self.subtitle("LEFT paints; RIGHT erases. With 'Brighten on re-pass' ON, LMB increases level step-by-step. With it OFF, LMB paints max level. "
+                      "Line / Rect / Fill tools paint the chosen level (RIGHT: erase).")
 
-        width  = LEFT_MARGIN + COLS*(CELL+GAP)
+        self.view_weeks = min(COLS, weeks)
+        width  = LEFT_MARGIN + self.view_weeks*(CELL+GAP)
         height = TOP_MARGIN  + ROWS*(CELL+GAP) + 60
-        self.canvas = tk.Canvas(self.frame, width=width, height=height, bg=C_CANVAS, highlightthickness=0)
-        self.canvas.pack(padx=10, pady=(6,10))
+        self.canvas = tk.Canvas(self.frame, width=width, height=height, bg=C_CANVAS, highlightthickness=0,
+                                scrollregion=(0, 0, LEFT_MARGIN + weeks*(CELL+GAP), height),
+                                xscrollincrement=CELL+GAP)
+        self.canvas.pack(padx=10, pady=(6,10 if weeks <= COLS else 0))
+        if weeks > COLS:
+            self.xscroll = tk.Scrollbar(self.frame, orient="horizontal", command=self.canvas.xview)
+            self.xscroll.pack(fill="x", padx=10, pady=(0,10))
+            self.canvas.configure(xscrollcommand=self._on_xscroll)
+            self.canvas.bind("<Shift-MouseWheel>", lambda e: self.canvas.xview_scroll(-1 if e.delta > 0 else 1, "units"))
+            self.canvas.bind("<Shift-Button-4>", lambda e: self.canvas.xview_scroll(-1, "units"))
+            self.canvas.bind("<Shift-Button-5>", lambda e: self.canvas.xview_scroll(1, "units"))
         # bindings
         self.canvas.bind("<Button-1>", self._paint_draw_start)
         self.canvas.bind("<B1-Motion>", self._paint_draw_drag)
@@ -260,6 +334,14 @@ class App:
                        variable=self.brighten_repass, onvalue=True, offvalue=False,
                        bg=C_BG, fg=C_TEXT, selectcolor=C_BG, activebackground=C_BG)\
             .grid(row=0, column=5, sticky="w")
+        tk.Checkbutton(ctrl_top, text="Adaptive pacing (delay = min)",
+                       variable=self.adaptive, onvalue=True, offvalue=False,
+                       bg=C_BG, fg=C_TEXT, selectcolor=C_BG, activebackground=C_BG)\
+            .grid(row=1, column=0, sticky="w", padx=(0,8))
+        tk.Label(ctrl_top, text="Max delay (sec):", bg=C_BG, fg=C_SUBTEXT).grid(row=1, column=3, sticky="e")
+        tk.Spinbox(ctrl_top, from_=0, to=600, width=4, textvariable=self.max_delay,
+                   bg=C_EMPTY, fg=C_TEXT, insertbackground=C_TEXT, relief="solid", bd=1)\
+            .grid(row=1, column=4, sticky="w", padx=(4,18))
 
         dens = tk.Frame(self.frame, bg=C_BG); dens.pack(fill="x", padx=12, pady=(0,2))
         tk.Checkbutton(dens, text="Use fixed level counts",
@@ -283,6 +365,39 @@ class App:
                    bg=C_EMPTY, fg=C_TEXT, insertbackground=C_TEXT, relief="solid", bd=1)\
             .grid(row=0, column=8, sticky="w")
 
+        gen = tk.Frame(self.frame, bg=C_BG); gen.pack(fill="x", padx=12, pady=(2,2))
+        tk.Checkbutton(gen, text="Fast commits (git fast-import)",
+                       variable=self.fast_import, onvalue=True, offvalue=False,
+                       bg=C_BG, fg=C_TEXT, selectcolor=C_BG, activebackground=C_BG)\
+            .grid(row=0, column=0, sticky="w")
+        tk.Label(gen, text="Commit content:", bg=C_BG, fg=C_SUBTEXT).grid(row=0, column=1, padx=(18,4), sticky="e")
+        om = tk.OptionMenu(gen, self.content_mode, *CONTENT_MODES)
+        om.configure(bg=C_EMPTY, fg=C_TEXT, activebackground="#21262d", highlightthickness=0, bd=0)
+        om["menu"].configure(bg=C_EMPTY, fg=C_TEXT)
+        om.grid(row=0, column=2, sticky="w")
+        tk.Checkbutton(gen, text="Only add missing commits (delta)",
+                       variable=self.delta_mode, onvalue=True, offvalue=False,
+                       bg=C_BG, fg=C_TEXT, selectcolor=C_BG, activebackground=C_BG)\
+            .grid(row=0, column=3, sticky="w", padx=(18,0))
+
+        shapes = tk.Frame(self.frame, bg=C_BG); shapes.pack(fill="x", padx=12, pady=(2,0))
+        tk.Label(shapes, text="Tool:", bg=C_BG, fg=C_SUBTEXT).pack(side="left", padx=(0,4))
+        for name in SHAPES:
+            tk.Radiobutton(shapes, text={"box": "Rect outline", "fill": "Fill"}.get(name, name.capitalize()),
+                           variable=self.tool, value=name, bg=C_BG, fg=C_TEXT, selectcolor=C_BG,
+                           activebackground=C_BG).pack(side="left", padx=(0,6))
+        tk.Label(shapes, text="Level:", bg=C_BG, fg=C_SUBTEXT).pack(side="left", padx=(12,4))
+        tk.Spinbox(shapes, from_=1, to=4, width=3, textvariable=self.tool_level,
+                   bg=C_EMPTY, fg=C_TEXT, insertbackground=C_TEXT, relief="solid", bd=1).pack(side="left")
+
+        tools = tk.Frame(self.frame, bg=C_BG); tools.pack(fill="x", padx=12, pady=(2,0))
+        tool_buttons = [("Undo", self.undo), ("Redo", self.redo), ("Open…", self.open_pattern), ("Save…", self.save_pattern_as), ("Share…", self.share_pattern),
+                        ("Import image…", self.import_image), ("Text…", self.text_tool), ("Verify", self.verify_threaded)]
+        for i, (label, cmd) in enumerate(tool_buttons):
+            tools.grid_columnconfigure(i, weight=1)
+            tk.Button(tools, text=label, command=cmd, **self.btn(width=10 if i > 1 else 5))\
+                .grid(row=0, column=i, sticky="ew", padx=(0 if i == 0 else 4, 0), pady=4)
+
         ctrl = tk.Frame(self.frame, bg=C_BG); ctrl.pack(fill="x", padx=12, pady=(2,6))
         for i in range(3): ctrl.grid_columnconfigure(i, weight=1)
         tk.Button(ctrl, text="Commit density…", command=self.set_commit_mode, **self.btn()).grid(row=0, column=0, sticky="ew", padx=(0,6), pady=4)
@@ -302,117 +417,428 @@ class App:
         self.canvas.create_oval(x1 - 2*r, y1 - 2*r, x1, y1, fill=fill, outline=fill)
 
     def draw_grid(self):
+        # full draw: decorations that stay in view ("fixed") + the cell pages under the current view
         self.canvas.delete("all")
+        self.cell_items = {}
+        self.pages = set()
+        self.fixed_x = 0
 
-        last_end = -999
+        self.month_labels, last_end = [], -999
+        multi = self.grid.weeks > COLS
         for x, label in month_label_positions(self.start_date, self.end_date):
             if x >= last_end + MONTH_LABEL_GAP:
-                self.canvas.create_text(
-                    LEFT_MARGIN + x * (CELL + GAP),
-                    TOP_MARGIN - 12,
-                    text=label, fill=C_SUBTEXT,
-                    font=("Arial", 8), anchor="w"
-                )
+                if multi and label == "Jan":
+                    label = str((self.start_date + dt.timedelta(weeks=x, days=6)).year)
+                self.month_labels.append((x, label))
                 last_end = x + MONTH_LABEL_COLS
 
-        # weekdays
+        # weekdays, on a backing strip so scrolled cells pass underneath
+        self.canvas.create_rectangle(0, 0, LEFT_MARGIN - GAP, TOP_MARGIN + ROWS * (CELL + GAP),
+                                     fill=C_CANVAS, outline="", tags="fixed")
         for y, label in [(1, "Mon"), (3, "Wed"), (5, "Fri")]:
             self.canvas.create_text(
                 LEFT_MARGIN - 12,
                 TOP_MARGIN + y * (CELL + GAP) + CELL // 2,
-                text=label, fill=C_SUBTEXT, font=("Arial", 8), anchor="e"
+                text=label, fill=C_SUBTEXT, font=("Arial", 8), anchor="e", tags="fixed"
             )
 
-        # cells
-        palette = [C_EMPTY, C_LV1, C_LV2, C_LV3, C_LV4]
-        for y in range(ROWS):
-            for x in range(COLS):
-                level = self.grid[y][x]
-                fill = palette[level] if 0 <= level <= 4 else C_EMPTY
-                x0 = LEFT_MARGIN + x * (CELL + GAP)
-                y0 = TOP_MARGIN + y * (CELL + GAP)
-                self.canvas.create_rectangle(
-                    x0, y0, x0 + CELL, y0 + CELL,
-                    fill=fill, outline=C_CANVAS
-                )
-
-        # date range + legend
-        self.canvas.create_text(
-            LEFT_MARGIN + COLS * (CELL + GAP) // 2,
+        # date range (of the visible weeks) + legend
+        self.range_item = self.canvas.create_text(
+            LEFT_MARGIN + self.view_weeks * (CELL + GAP) // 2,
             TOP_MARGIN + ROWS * (CELL + GAP) + 12,
-            text=f"{self.start_date:%Y-%m-%d} … {self.end_date:%Y-%m-%d}",
-            fill=C_SUBTEXT, font=("Arial", 8)
+            text="", fill=C_SUBTEXT, font=("Arial", 8), tags="fixed"
         )
 
         lx = LEFT_MARGIN
         ly = TOP_MARGIN + ROWS * (CELL + GAP) + 30
-        self.canvas.create_text(lx, ly + 6, text="Less", fill=C_SUBTEXT, font=("Arial", 8), anchor="w")
-        for i, c in enumerate([C_EMPTY, C_LV1, C_LV2, C_LV3, C_LV4]):
+        self.canvas.create_text(lx, ly + 6, text="Less", fill=C_SUBTEXT, font=("Arial", 8), anchor="w", tags="fixed")
+        for i, c in enumerate(PALETTE):
             x0 = lx + 38 + i * (CELL + GAP)
-            self.canvas.create_rectangle(x0, ly, x0 + CELL, ly + CELL, fill=c, outline=C_CANVAS)
-        self.canvas.create_text(lx + 38 + 5 * (CELL + GAP) + 8, ly + 6, text="More", fill=C_SUBTEXT, font=("Arial", 8), anchor="w")
+            self.canvas.create_rectangle(x0, ly, x0 + CELL, ly + CELL, fill=c, outline=C_CANVAS, tags="fixed")
+        self.canvas.create_text(lx + 38 + 5 * (CELL + GAP) + 8, ly + 6, text="More", fill=C_SUBTEXT, font=("Arial", 8),
+                                anchor="w", tags="fixed")
+
+        self.render_visible()
+
+    def draw_page(self, p):
+        # cells + month labels of week columns [p*PAGE_WEEKS, (p+1)*PAGE_WEEKS), one persistent rectangle per cell
+        tag = f"page{p}"
+        x_lo, x_hi = p * PAGE_WEEKS, min((p + 1) * PAGE_WEEKS, self.grid.weeks)
+        for x, label in self.month_labels:
+            if x_lo <= x < x_hi:
+                self.canvas.create_text(LEFT_MARGIN + x * (CELL + GAP), TOP_MARGIN - 12,
+                                        text=label, fill=C_SUBTEXT, font=("Arial", 8), anchor="w", tags=tag)
+        for x in range(x_lo, x_hi):
+            x0 = LEFT_MARGIN + x * (CELL + GAP)
+            for y in range(ROWS):
+                y0 = TOP_MARGIN + y * (CELL + GAP)
+                self.cell_items[(y, x)] = self.canvas.create_rectangle(
+                    x0, y0, x0 + CELL, y0 + CELL,
+                    fill=self.cell_fill(y, x), outline=C_CANVAS, tags=tag
+                )
 
-    def cell_at(self, event):
-        x = (event.x - LEFT_MARGIN) // (CELL+GAP)
+    def render_visible(self):
+        # create pages scrolled into view, drop the ones scrolled out, keep the fixed items in place
+        left = self.canvas.canvasx(0)
+        first = max(0, int(left - LEFT_MARGIN) // (CELL + GAP))
+        last = min(self.grid.weeks, first + self.view_weeks + 1) - 1
+        want = set(range(first // PAGE_WEEKS, last // PAGE_WEEKS + 1))
+        for p in self.pages - want:
+            self.canvas.delete(f"page{p}")
+            for x in range(p * PAGE_WEEKS, min((p + 1) * PAGE_WEEKS, self.grid.weeks)):
+                for y in range(ROWS): self.cell_items.pop((y, x), None)
+        for p in sorted(want - self.pages): self.draw_page(p)
+        self.pages = want
+        if left != self.fixed_x:
+            self.canvas.move("fixed", left - self.fixed_x, 0); self.fixed_x = left
+        self.canvas.tag_raise("check"); self.canvas.tag_raise("fixed")
+        shown_end = min(self.grid.end, self.start_date + dt.timedelta(weeks=first + self.view_weeks, days=-1))
+        self.canvas.itemconfig(self.range_item,
+                               text=f"{self.start_date + dt.timedelta(weeks=first):%Y-%m-%d} … {shown_end:%Y-%m-%d}")
+
+    def _on_xscroll(self, first, last):
+        self.xscroll.set(first, last)
+        self.render_visible()
+
+    def cell_fill(self, y, x):
+        level = self.grid[y][x]
+        return PALETTE[level] if 0 <= level <= 4 else C_EMPTY
+
+    def redraw_cells(self, cells):
+        # incremental update: recolor only the given (y, x) cells (those not on screen get drawn on scroll-in)
+        for y, x in cells:
+            item = self.cell_items.get((y, x))
+            if item: self.canvas.itemconfig(item, fill=self.cell_fill(y, x))
+
+    def cell_at(self, event, clamp=False):
+        x = (self.canvas.canvasx(event.x) - LEFT_MARGIN) // (CELL+GAP)
         y = (event.y - TOP_MARGIN)  // (CELL+GAP)
-        if 0 <= x < COLS and 0 <= y < ROWS:
+        if clamp:                                          # shape drags may leave the grid; pin to its edge
+            x, y = min(max(x, 0), self.grid.weeks - 1), min(max(y, 0), ROWS - 1)
+        if 0 <= x < self.grid.weeks and 0 <= y < ROWS:
             return int(y), int(x)
         return None, None
 
     # --- LMB: brighten behavior per checkbox
+    def paint_cell(self, y, x, level):
+        old = self.grid[y][x]
+        if old != level:
+            self.grid[y][x] = level
+            self.history.record(y, x, old, level)
+            self.redraw_cells([(y, x)])
+
     def _paint_draw_start(self, e):
+        if self.tool.get() != "brush": return self._shape_start(e, erase=False)
         y, x = self.cell_at(e)
         if y is None: return
         if self.brighten_repass.get():
             new_level = min(4, self.grid[y][x] + 1)
         else:
             new_level = 4
-        self.grid[y][x] = new_level
+        self.history.begin()
+        self.paint_cell(y, x, new_level)
         self.paint_level = new_level
         self.painting = True
         self.last_cell = (y, x)
         self.drag_brighten_active = bool(self.brighten_repass.get())
-        self.draw_grid()
 
     def _paint_draw_drag(self, e):
+        if self.shape: return self._shape_drag(e)
         if not self.painting: return
         y, x = self.cell_at(e)
         if y is None: return
         if (y, x) != self.last_cell:
             if self.drag_brighten_active:
-                self.grid[y][x] = min(4, self.grid[y][x] + 1)
+                self.paint_cell(y, x, min(4, self.grid[y][x] + 1))
             else:
-                self.grid[y][x] = 4
+                self.paint_cell(y, x, 4)
             self.last_cell = (y, x)
-            self.draw_grid()
 
     # --- RMB: erase
     def _paint_erase_start(self, e):
+        if self.tool.get() != "brush": return self._shape_start(e, erase=True)
         y, x = self.cell_at(e)
         if y is None: return
-        self.grid[y][x] = 0
+        self.history.begin()
+        self.paint_cell(y, x, 0)
         self.painting = True
         self.last_cell = (y, x)
-        self.draw_grid()
 
     def _paint_erase_drag(self, e):
+        if self.shape: return self._shape_drag(e)
         if not self.painting: return
         y, x = self.cell_at(e)
         if y is None: return
         if (y, x) != self.last_cell:
-            self.grid[y][x] = 0
+            self.paint_cell(y, x, 0)
             self.last_cell = (y, x)
-            self.draw_grid()
 
-    def _paint_end(self, _e):
+    def _paint_end(self, e):
+        # a stroke (press -> release) is one undo step
+        if self.shape: return self._shape_end(e)
+        if self.painting: self.history.end()
         self.painting = False
         self.last_cell = None
+        self.grid_changed()
+
+    # --- shape tools: the outline previews on the canvas; the grid changes once, on release (fill: on click)
+    def _shape_start(self, e, erase):
+        y, x = self.cell_at(e)
+        if y is None: return
+        try: level = 0 if erase else max(1, min(4, self.tool_level.get()))
+        except tk.TclError: level = 4
+        if self.tool.get() == "fill":
+            self.apply_cells(flood_cells(self.grid.data, ROWS, y, x), level); return
+        self.shape = (y, x, level)
+        self._shape_drag(e)
+
+    def shape_cells(self, y, x):
+        y0, x0, _ = self.shape
+        if self.tool.get() == "line": return line_cells(y0, x0, y, x)
+        return rect_cells(y0, x0, y, x, filled=(self.tool.get() == "rect"))
+
+    def _shape_drag(self, e):
+        self.canvas.delete("shape")
+        for y, x in self.shape_cells(*self.cell_at(e, clamp=True)):
+            x0, y0 = LEFT_MARGIN + x * (CELL + GAP), TOP_MARGIN + y * (CELL + GAP)
+            self.canvas.create_rectangle(x0, y0, x0 + CELL, y0 + CELL, outline=C_TEXT, tags="shape")
+
+    def _shape_end(self, e):
+        self.canvas.delete("shape")
+        cells = self.shape_cells(*self.cell_at(e, clamp=True))
+        level = self.shape[2]
+        self.shape = None
+        self.apply_cells(cells, level)
+
+    def apply_cells(self, cells, level):
+        # set `cells` to `level` as one edit (one undo step) and one batched redraw of what changed
+        data, changed = self.grid.data, []
+        self.history.begin()
+        for y, x in cells:
+            slot = x * ROWS + y
+            if data[slot] != level:
+                self.history.record(y, x, data[slot], level)
+                data[slot] = level; changed.append((y, x))
+        self.history.end()
+        self.redraw_cells(changed)
+        if changed: self.grid_changed()
+        return changed
+
+    def undo(self):
+        changed = self.history.step(self.grid, undo=True)
+        if changed: self.redraw_cells(changed); self.grid_changed()
+
+    def redo(self):
+        changed = self.history.step(self.grid, undo=False)
+        if changed: self.redraw_cells(changed); self.grid_changed()
 
     def clear_grid(self):
-        for y in range(ROWS):
-            for x in range(COLS):
-                self.grid[y][x] = 0
-        self.draw_grid()
+        changed = []
+        self.history.begin()
+        for y, x, level in self.grid.cells():
+            self.grid[y][x] = 0
+            self.history.record(y, x, level, 0); changed.append((y, x))
+        self.history.end()
+        self.redraw_cells(changed)
+        self.grid_changed()
+
+    def set_levels(self, rows):
+        # replace the whole grid with `rows` (ROWS × weeks levels) in one step (one undo step, unless the
+        # caller holds an edit open); redraws only what changed
+        changed = []
+        self.history.begin()
+        for y, row in enumerate(rows):
+            cur = self.grid[y]
+            for x, level in enumerate(row):
+                if cur[x] != level:
+                    self.history.record(y, x, cur[x], level)
+                    cur[x] = level; changed.append((y, x))
+        self.history.end()
+        self.redraw_cells(changed)
+        if changed: self.grid_changed()
+        return changed
+
+    def first_visible_week(self):
+        return max(0, int(self.canvas.canvasx(0) - LEFT_MARGIN) // (CELL + GAP))
+
+    # ---------- patterns: files, share strings, autosave ----------
+    def apply_pattern(self, grid: GridStore, density: Density):
+        # take over a loaded drawing with its density; its period is selected when the app can show it,
+        # otherwise step 3 lays it out from the first week of the current period
+        self.use_fixed_levels.set(density.fixed)
+        for i in range(1, 5): self.lv_counts[i].set(density.lv_counts[i])
+        self.min_commits, self.max_commits = density.min_commits, density.max_commits
+        self.grid = grid
+        self.history.clear()
+        period = period_of(grid.start, grid.end)
+        if period:
+            mode, first, last = period
+            self.year_mode.set(mode)
+            if first: self.year_value.set(first); self.year_last.set(last)
+        if self.step == 3: self.render_step3()
+
+    def open_pattern(self):
+        path = filedialog.askopenfilename(title="Open pattern",
+                                          filetypes=[("Patterns", "*.gpat *.txt"), ("All files", "*.*")])
+        if not path: return
+        try:
+            grid, start, density = read_pattern(path, self.grid.weeks)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            messagebox.showerror("Open pattern", str(e)); return
+        if start is None:                                   # text pattern: no period / density of its own
+            grid, density = GridStore.from_rows(grid, self.grid.start), self.density()
+        self.apply_pattern(grid, density); self.grid_changed()
+        self.set_status(f"Pattern loaded: {os.path.basename(path)}")
+
+    def save_pattern_as(self):
+        path = filedialog.asksaveasfilename(title="Save pattern", defaultextension=".gpat",
+                                            filetypes=[("Patterns", "*.gpat")])
+        if not path: return
+        try:
+            save_pattern(path, self.grid, self.density())
+            self.set_status(f"Pattern saved: {os.path.basename(path)}")
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Save pattern", str(e))
+
+    def share_pattern(self):
+        # the drawing as a one-line string to paste elsewhere; pasting one here and pressing Load opens it
+        try: text = share_string(self.grid, self.density())
+        except ValueError as e:
+            messagebox.showerror("Share pattern", str(e)); return
+        top = tk.Toplevel(self.root); top.title("Share pattern"); top.configure(bg=C_BG)
+        top.resizable(False, False); top.transient(self.root)
+        tk.Label(top, text="Share string (copy it, or paste one and press Load):",
+                 bg=C_BG, fg=C_TEXT).pack(anchor="w", padx=12, pady=(12,6))
+        e = tk.Entry(top, width=72, bg=C_EMPTY, fg=C_TEXT, insertbackground=C_TEXT, relief="solid", bd=1, highlightthickness=0)
+        e.insert(0, text); e.pack(padx=12, fill="x"); e.select_range(0, "end"); e.focus_set()
+
+        def copy():
+            self.root.clipboard_clear(); self.root.clipboard_append(e.get()); self.set_status("Share string copied.")
+        def load():
+            try:
+                grid, density = from_share_string(e.get())
+            except ValueError as ex:
+                messagebox.showerror("Share string", str(ex), parent=top); return
+            top.destroy(); self.apply_pattern(grid, density); self.grid_changed()
+            self.set_status("Pattern loaded from share string.")
+        btns = tk.Frame(top, bg=C_BG); btns.pack(fill="x", padx=12, pady=12)
+        tk.Button(btns, text="Close", command=top.destroy, **self.btn(width=10)).pack(side="right", padx=(6,0))
+        tk.Button(btns, text="Load", command=load, **self.btn(width=10)).pack(side="right", padx=(6,0))
+        tk.Button(btns, text="Copy", command=copy, **self.btn(primary=True, width=10)).pack(side="right")
+
+    def grid_changed(self):
+        # debounced autosave: a burst of edits (a stroke, a slider drag) is written once
+        if self.step == 3: self.canvas.delete("check")     # a verify overlay describes the old drawing
+        if self._autosave_job: self.root.after_cancel(self._autosave_job)
+        self._autosave_job = self.root.after(AUTOSAVE_MS, self.autosave)
+
+    def autosave(self):
+        self._autosave_job = None
+        try: save_pattern(autosave_path(), self.grid, self.density())
+        except (OSError, ValueError): pass                  # unwritable folder, or a density a pattern can't hold
+
+    def on_close(self):
+        if self._autosave_job:
+            self.root.after_cancel(self._autosave_job); self.autosave()
+        self.root.destroy()
+
+    # ---------- image import ----------
+    def import_image(self):
+        # the canvas itself is the preview: every slider / checkbox change re-quantizes and recolors
+        from image_import import DEFAULT_THRESHOLDS, ImageSource, available as image_import_available
+        if not image_import_available():
+            messagebox.showerror("Image import", "Image import needs Pillow (pip install pillow)."); return
+        path = filedialog.askopenfilename(title="Import image",
+                                          filetypes=[("Images", "*.png *.jpg *.jpeg *.gif *.bmp *.webp"), ("All files", "*.*")])
+        if not path: return
+        try:
+            src = ImageSource(path)
+        except Exception as e:
+            messagebox.showerror("Image import", str(e)); return
+        before = self.grid.rows()
+        self.history.begin()                                # the whole dialog session is one undo step
+        offset = self.first_visible_week() if self.grid.weeks > COLS else None
+
+        top = tk.Toplevel(self.root); top.title("Import image"); top.configure(bg=C_BG)
+        top.resizable(False, False); top.transient(self.root)
+        thresholds = [tk.IntVar(value=round(t * 100)) for t in DEFAULT_THRESHOLDS]
+        dither, invert, fit = tk.BooleanVar(value=False), tk.BooleanVar(value=False), tk.BooleanVar(value=True)
+
+        def preview(*_):
+            levels = src.levels(ROWS, self.grid.weeks, [v.get() / 100 for v in thresholds],
+                                dither=dither.get(), invert=invert.get(), fit=fit.get(), offset=offset)
+            self.set_levels(levels)
+
+        tk.Label(top, text=f"{os.path.basename(path)} — {src.size[0]}×{src.size[1]}",
+                 bg=C_BG, fg=C_TEXT).grid(row=0, column=0, columnspan=2, sticky="w", padx=12, pady=(12,6))
+        for i, var in enumerate(thresholds, start=1):
+            tk.Label(top, text=f"L{i} from (%):", bg=C_BG, fg=C_SUBTEXT).grid(row=i, column=0, sticky="e", padx=(12,4))
+            tk.Scale(top, from_=1, to=100, orient="horizontal", length=220, variable=var, command=preview,
+                     bg=C_BG, fg=C_TEXT, troughcolor=C_EMPTY, highlightthickness=0)\
+                .grid(row=i, column=1, sticky="w", padx=(0,12))
+        opts = tk.Frame(top, bg=C_BG); opts.grid(row=5, column=0, columnspan=2, sticky="w", padx=12, pady=6)
+        for text, var in (("Dither", dither), ("Invert (light = ink)", invert), ("Keep aspect", fit)):
+            tk.Checkbutton(opts, text=text, variable=var, onvalue=True, offvalue=False, command=preview,
+                           bg=C_BG, fg=C_TEXT, selectcolor=C_BG, activebackground=C_BG).pack(side="left", padx=(0,10))
+
+        def apply():
+            top.destroy(); self.history.end(); self.set_status(f"Image imported: {os.path.basename(path)}")
+        def cancel():
+            top.destroy(); self.set_levels(before); self.history.end()
+        btns = tk.Frame(top, bg=C_BG); btns.grid(row=6, column=0, columnspan=2, sticky="e", padx=12, pady=(4,12))
+        tk.Button(btns, text="Cancel", command=cancel, **self.btn(width=10)).pack(side="right", padx=(6,0))
+        tk.Button(btns, text="Apply", command=apply, **self.btn(primary=True, width=10)).pack(side="right")
+        top.protocol("WM_DELETE_WINDOW", cancel)
+        preview()
+
+    # ---------- text banner ----------
+    def text_tool(self):
+        # stamps a banner over the drawing (or onto a cleared grid); live preview on the canvas like image import
+        before = self.grid.rows()
+        self.history.begin()                                # the whole dialog session is one undo step
+        offset, width = (self.first_visible_week(), self.view_weeks) if self.grid.weeks > COLS else (0, self.grid.weeks)
+
+        top = tk.Toplevel(self.root); top.title("Text"); top.configure(bg=C_BG)
+        top.resizable(False, False); top.transient(self.root)
+        text, align = tk.StringVar(), tk.StringVar(value="center")
+        level, kerning, clear = tk.IntVar(value=4), tk.BooleanVar(value=True), tk.BooleanVar(value=False)
+
+        def preview(*_):
+            rows = [[0] * self.grid.weeks for _ in range(ROWS)] if clear.get() else [row[:] for row in before]
+            cells, clipped = text_cells(text.get(), width, align.get(), kerning=kerning.get(), offset=offset)
+            try: lv = max(1, min(4, level.get()))
+            except tk.TclError: lv = 4
+            for y, x in cells: rows[y][x] = lv
+            self.set_levels(rows)
+            self.set_status("Text does not fit; it is cut at the edge." if clipped else "Ready.")
+
+        tk.Label(top, text="Text:", bg=C_BG, fg=C_SUBTEXT).grid(row=0, column=0, sticky="e", padx=(12,4), pady=(12,6))
+        e = tk.Entry(top, width=32, textvariable=text, bg=C_EMPTY, fg=C_TEXT, insertbackground=C_TEXT,
+                     relief="solid", bd=1, highlightthickness=0)
+        e.grid(row=0, column=1, columnspan=3, sticky="ew", padx=(0,12), pady=(12,6)); e.focus_set()
+        tk.Label(top, text="Align:", bg=C_BG, fg=C_SUBTEXT).grid(row=1, column=0, sticky="e", padx=(12,4))
+        om = tk.OptionMenu(top, align, *ALIGNS, command=preview)
+        om.configure(bg=C_EMPTY, fg=C_TEXT, activebackground="#21262d", highlightthickness=0, bd=0)
+        om.grid(row=1, column=1, sticky="w")
+        tk.Label(top, text="Level:", bg=C_BG, fg=C_SUBTEXT).grid(row=1, column=2, sticky="e", padx=(12,4))
+        tk.Spinbox(top, from_=1, to=4, width=3, textvariable=level, command=preview,
+                   bg=C_EMPTY, fg=C_TEXT, insertbackground=C_TEXT, relief="solid", bd=1)\
+            .grid(row=1, column=3, sticky="w", padx=(0,12))
+        opts = tk.Frame(top, bg=C_BG); opts.grid(row=2, column=0, columnspan=4, sticky="w", padx=12, pady=6)
+        for label, var in (("Kerning", kerning), ("Clear grid first", clear)):
+            tk.Checkbutton(opts, text=label, variable=var, onvalue=True, offvalue=False, command=preview,
+                           bg=C_BG, fg=C_TEXT, selectcolor=C_BG, activebackground=C_BG).pack(side="left", padx=(0,10))
+        text.trace_add("write", preview)
+
+        def apply(_=None):
+            top.destroy(); self.history.end(); self.set_status(f"Text added: {text.get()}")
+        def cancel(_=None):
+            top.destroy(); self.set_levels(before); self.history.end(); self.set_status("Ready.")
+        btns = tk.Frame(top, bg=C_BG); btns.grid(row=3, column=0, columnspan=4, sticky="e", padx=12, pady=(4,12))
+        tk.Button(btns, text="Cancel", command=cancel, **self.btn(width=10)).pack(side="right", padx=(6,0))
+        tk.Button(btns, text="Apply", command=apply, **self.btn(primary=True, width=10)).pack(side="right")
+        top.bind("<Return>", apply); top.bind("<Escape>", cancel)
+        top.protocol("WM_DELETE_WINDOW", cancel)
 
     # ---------- density dialog (optional range mode) ----------
     def set_commit_mode(self):
@@ -421,14 +847,7 @@ class App:
                        "Tip: with 'Use fixed level counts' ON, these values are ignored.")
         if not txt: return
         try:
-            if "-" in txt:
-                m, n = map(int, txt.split("-", 1))
-                if m < 1 or n < m: raise ValueError
-                self.min_commits, self.max_commits = m, n
-            else:
-                n = int(txt)
-                if n < 1: raise ValueError
-                self.min_commits = self.max_commits = n
+            self.min_commits, self.max_commits = parse_range(txt)
             self.set_status(f"Commit density (range): {self.min_commits}…{self.max_commits}")
         except Exception:
             messagebox.showerror("Invalid format", "Examples: 1, 5, 2-7")
@@ -437,6 +856,7 @@ class App:
     def create_local_repo(self):
         path = filedialog.askdirectory(title="Choose folder for new local repo")
         if not path: return
+        from git import Repo
         Repo.init(path)
         self.repo_path = path
         self.refresh_checklist(); self.set_status("Local repo created.")
@@ -475,11 +895,7 @@ class App:
             messagebox.showerror("Required", "Repository name is required"); return
         description = inputbox(self.root, "Description (optional)", "Short description:", "")
         try:
-            headers = api_headers(self.token)
-            payload = {"name": repo_name, "description": description, "private": True, "auto_init": False}
-            url = f"https://api.github.com/orgs/{owner}/repos" if owner else "https://api.github.com/user/repos"
-            r = requests.post(url, headers=headers, json=payload, timeout=20); r.raise_for_status()
-            data = r.json()
+            data = create_private_repo(self.token, repo_name, description, owner or None)
             self.remote_url = data["clone_url"]
             if not (self.git_user_name and self.git_user_email): self.set_github_info()
             self.refresh_checklist(); self.set_status(f"Private repo created: {data['full_name']}")
@@ -489,155 +905,73 @@ class App:
 
     # ---------- push pipeline ----------
     def push_threaded(self):
-        threading.Thread(target=self.make_commits_and_push, daemon=True).start()
-
-    def sync_with_remote(self, repo, branch: str):
-        try:
-            remote = repo.remote("origin"); remote.fetch()
-        except Exception:
-            return
-        remote_branches = {ref.name.split("/",1)[1] for ref in remote.refs if "/" in ref.name}
-        if branch not in remote_branches:
-            return
-        try: repo.git.branch("--set-upstream-to", f"origin/{branch}", branch)
-        except Exception: pass
+        # Tk state is read here, on the Tk thread; the worker only sees the PixelJob
+        job = self.build_job()
+        self.disable_ui(True)
+        if not (self.git_user_name and self.git_user_email):
+            messagebox.showwarning("Identity","Git identity is not set. Your contributions may not count.\nUse 'Enter identity manually' on Step 1.")
+        threading.Thread(target=self.make_commits_and_push, args=(job,), daemon=True).start()
+
+    def density(self) -> Density:
+        return Density(fixed=bool(self.use_fixed_levels.get()),
+                       lv_counts=[v.get() for v in self.lv_counts[1:]],
+                       min_commits=self.min_commits, max_commits=self.max_commits)
+
+    def pacer(self):
+        if not self.adaptive.get(): return None
+        low = max(0, self.batch_delay.get())
+        return PushPacer(min_delay=low, max_delay=max(low, self.max_delay.get()))
+
+    def build_job(self) -> PixelJob:
+        return PixelJob(self.repo_path, self.remote_url, self.token,
+                        self.grid.copy(), self.start_date, self.density(),
+                        name=self.git_user_name, email=self.git_user_email,
+                        safe_mode=bool(self.safe_mode.get()),
+                        batch_weeks=self.batch_weeks.get(), batch_delay=self.batch_delay.get(),
+                        fast_import=bool(self.fast_import.get()), content_mode=self.content_mode.get(),
+                        delta=bool(self.delta_mode.get()), pacer=self.pacer(),
+                        status=self.set_status,
+                        confirm=lambda title, question: self.ui(messagebox.askyesno, title, question))
+
+    def make_commits_and_push(self, job: PixelJob):
+        # worker thread: no direct Tk calls, only set_status / self.ui
         try:
-            repo.git.merge("--ff-only", f"origin/{branch}"); return
-        except Exception:
-            pass
-        try:
-            repo.git.merge("--no-edit", "--allow-unrelated-histories", f"origin/{branch}")
-        except Exception:
-            try: repo.git.rebase(f"origin/{branch}")
-            except Exception: pass
-
-    def commits_for_level(self, level: int) -> int:
-        if level <= 0: return 0
-        if self.use_fixed_levels.get():
-            return max(1, int(self.lv_counts[level].get()))
-        lo, hi = self.min_commits, self.max_commits
-        if hi < lo: hi = lo
-        if lo == hi: return lo
-        span = hi - lo
-        b0 = lo
-        b1 = lo + math.ceil(span*1/4)
-        b2 = lo + math.ceil(span*2/4)
-        b3 = lo + math.ceil(span*3/4)
-        b4 = hi
-        lows  = [b0, b1, b2, b3]
-        highs = [b1, b2, b3, b4]
-        l = max(lows[level-1], lo)
-        h = max(l, highs[level-1])
-        return random.randint(l, h)
-
-    def make_commits_for_columns(self, repo: Repo, x_columns, total_days_counter):
-        for x in x_columns:
-            for y in range(ROWS):
-                level = self.grid[y][x]
-                if level > 0:
-                    day = self.start_date + dt.timedelta(weeks=x, days=y)
-                    count = self.commits_for_level(level)
-                    for _ in range(count):
-                        env = os.environ.copy()
-                        env["GIT_AUTHOR_NAME"] = self.git_user_name or "author"
-                        env["GIT_AUTHOR_EMAIL"] = self.git_user_email or "author@users.noreply.github.com"
-                        env["GIT_COMMITTER_NAME"] = env["GIT_AUTHOR_NAME"]
-                        env["GIT_COMMITTER_EMAIL"] = env["GIT_AUTHOR_EMAIL"]
-                        iso = day.strftime("%Y-%m-%dT12:00:00+00:00")
-                        env["GIT_AUTHOR_DATE"] = iso; env["GIT_COMMITTER_DATE"] = iso
-                        with open("pixels.txt", "a", encoding="utf-8") as f: f.write(f"{iso}\n")
-                        repo.git.add("pixels.txt"); repo.git.commit("-m", f"Pixel {x},{y}", env=env)
-                    total_days_counter["done"] += 1
-                    self.set_status(f"Committing days: {total_days_counter['done']}/{total_days_counter['total']}…")
-
-    def make_commits_and_push(self):
-        try:
-            self.disable_ui(True); self.set_status("Preparing repository…")
-
-            if not (self.git_user_name and self.git_user_email):
-                messagebox.showwarning("Identity","Git identity is not set. Your contributions may not count.\nUse 'Enter identity manually' on Step 1.")
-
-            repo = Repo(self.repo_path); os.chdir(self.repo_path)
-
-            # identity + silence credential helper
-            try:
-                with repo.config_writer() as cw:
-                    cw.set_value("user","name", self.git_user_name or "author")
-                    cw.set_value("user","email", self.git_user_email or "author@users.noreply.github.com")
-                    cw.set_value("credential","helper","")
-            except Exception:
-                repo.git.config("user.name", self.git_user_name or "author")
-                repo.git.config("user.email", self.git_user_email or "author@users.noreply.github.com")
-                try: repo.git.config("credential.helper","")
-                except Exception: pass
-
-            # origin with token
-            auth_url = self.auth_url(self.remote_url, self.token)
-            if "origin" not in [r.name for r in repo.remotes]:
-                repo.create_remote("origin", auth_url)
-            else:
-                try: repo.remote("origin").set_url(auth_url)
-                except Exception: repo.git.remote("set-url","origin", auth_url)
-
-            # initial commit
-            if not repo.head.is_valid():
-                with open("pixels.txt","w",encoding="utf-8") as f: f.write("init\n")
-                repo.git.add("pixels.txt"); repo.git.commit("-m","init")
-
-            active_cols = [x for x in range(COLS) if any(self.grid[y][x] > 0 for y in range(ROWS))]
-            total_days = sum(1 for x in active_cols for y in range(ROWS) if self.grid[y][x] > 0)
-            if total_days == 0:
-                self.set_status("Nothing selected."); return
-            counter = {"done":0,"total":total_days}
-
-            try: branch = repo.active_branch.name
-            except Exception:
-                repo.git.checkout("-b","main"); branch = "main"
-            if branch == "master":
-                try: repo.git.branch("-M","main"); branch = "main"
-                except Exception: pass
-
-            self.sync_with_remote(repo, branch)
-
-            if self.safe_mode.get():
-                n = max(1, int(self.batch_weeks.get()))
-                batches = [active_cols[i:i+n] for i in range(0, len(active_cols), n)]
-                first_push = True
-                for idx, cols in enumerate(batches, start=1):
-                    self.set_status(f"Batch {idx}/{len(batches)}: weeks {cols[0]}…{cols[-1]}")
-                    self.make_commits_for_columns(repo, cols, counter)
-                    try:
-                        if first_push: repo.git.push("-u","origin",branch); first_push = False
-                        else:          repo.git.push("origin",branch)
-                    except Exception as e:
-                        if messagebox.askyesno("Push issue","Remote ahead. Force-with-lease?"):
-                            repo.git.push("--force-with-lease","origin",branch)
-                        else:
-                            raise e
-                    delay = max(0, int(self.batch_delay.get()))
-                    if idx < len(batches) and delay > 0:
-                        self.set_status(f"Pushed batch {idx}. Cooling down {delay}s…")
-                        time.sleep(delay)
-            else:
-                self.set_status("Creating commits…")
-                self.make_commits_for_columns(repo, active_cols, counter)
-                self.set_status("Pushing…")
-                try:
-                    repo.git.push("-u","origin",branch)
-                except Exception as e:
-                    if messagebox.askyesno("Push issue","Remote ahead. Force-with-lease?"):
-                        repo.git.push("--force-with-lease","origin",branch)
-                    else:
-                        raise e
-
-            self.set_status("Done! Commits pushed.")
-            messagebox.showinfo("Almost there",
+            self.set_status("Preparing repository…")
+            if not job.run(): return
+            try: self.ui(self.show_check, job.verify())
+            except Exception as e: self.set_status(f"Pushed, but verify failed: {e}")
+            self.ui(messagebox.showinfo, "Almost there",
                 "Commits pushed.\nProfile → Contribution settings: enable “Include private contributions”.")
         except Exception as e:
             self.set_status(f"Error: {e}")
-            messagebox.showerror("Error", str(e))
+            self.ui(messagebox.showerror, "Error", str(e))
         finally:
-            self.disable_ui(False)
+            self.ui(self.disable_ui, False)
+
+    # ---------- verification ----------
+    def verify_threaded(self):
+        # recount the repo's pushed history against the drawing (the push does this on its own when done)
+        if not self.repo_path:
+            messagebox.showwarning("Verify", "Pick or create a local repository on Step 1 first."); return
+        job = self.build_job()
+        def work():
+            try: self.ui(self.show_check, job.verify())
+            except Exception as e: self.set_status(f"Verify failed: {e}")
+        threading.Thread(target=work, daemon=True).start()
+
+    def show_check(self, check: HistoryCheck):
+        # diff overlay: each day that doesn't match shows the level its commits give, ringed red (too few)
+        # or amber (too many); cleared by the next edit
+        self.set_status(check.summary())
+        if self.step != 3 or check.grid.start != self.grid.start: return
+        self.canvas.delete("check")
+        for color, cells in ((C_SHORT, check.short), (C_EXTRA, check.extra)):
+            for y, x, _, _ in cells:
+                x0, y0 = LEFT_MARGIN + x * (CELL + GAP), TOP_MARGIN + y * (CELL + GAP)
+                self.canvas.create_rectangle(x0, y0, x0 + CELL, y0 + CELL, outline=color, width=2, tags="check")
+                self.canvas.create_rectangle(x0 + 3, y0 + 3, x0 + CELL - 3, y0 + CELL - 3, outline="",
+                                             fill=PALETTE[check.levels[x * ROWS + y]], tags="check")
+        self.canvas.tag_raise("fixed")
 
     # ---------- misc ----------
     def identity_str(self):
@@ -660,14 +994,32 @@ class App:
             self.set_next_enabled(bool(self.repo_path and self.remote_url))
             self.root.update_idletasks()
 
-    @staticmethod
-    def auth_url(url: str, token: str) -> str:
-        if url and url.startswith("https://") and token:
-            return url.replace("https://", f"https://x-access-token:{quote(token, safe='')}@")
-        return url
-
     def set_status(self, text: str):
-        self.status_var.set(text); self.root.update_idletasks()
+        # safe from any thread; coalesced to the latest text every STATUS_REFRESH_MS
+        self.status_q.put(text)
+
+    def ui(self, fn, *args):
+        # run fn on the Tk thread and wait for its result (for the worker thread)
+        if threading.current_thread() is threading.main_thread(): return fn(*args)
+        done, box = threading.Event(), {}
+        def call():
+            try: box["v"] = fn(*args)
+            finally: done.set()
+        self.ui_q.put(call); done.wait()
+        return box.get("v")
+
+    def _pump(self):
+        text = None
+        try:
+            while True: text = self.status_q.get_nowait()
+        except queue.Empty:
+            pass
+        if text is not None: self.status_var.set(text)
+        try:
+            while True: self.ui_q.get_nowait()()
+        except queue.Empty:
+            pass
+        self.root.after(STATUS_REFRESH_MS, self._pump)
 
     def clear_frame(self):
         for w in getattr(self, "frame", []).winfo_children(): w.destroy()
@@ -680,8 +1032,8 @@ class App:
         tk.Label(self.frame, text=text, bg=C_BG, fg=C_SUBTEXT, justify="left", wraplength=820)\
             .pack(anchor="w", padx=12, pady=(0,8))
 
-    def btn(self, primary=False):
-        base = dict(bg=C_EMPTY, fg=C_TEXT, activebackground="#21262d", bd=0, padx=10, pady=8, width=BTN_W)
+    def btn(self, primary=False, width=BTN_W):
+        base = dict(bg=C_EMPTY, fg=C_TEXT, activebackground="#21262d", bd=0, padx=10, pady=8, width=width)
         if primary: base.update(bg=C_ACCENT, fg="white", activebackground=C_ACCENT_H)
         return base
 
@@ -716,7 +1068,19 @@ class App:
             except tk.TclError: pass
 
 # ---- run ----
+def report_startup(root, t_window):
+    # called once the first screen is drawn: timings (ms since bot.py started) + which heavy modules got pulled in
+    root.update_idletasks()
+    t_paint = time.perf_counter()
+    ms = lambda t: round((t - _T0) * 1000, 1)
+    print(json.dumps({"imports_ms": ms(_T_IMPORTS), "window_ms": ms(t_window), "first_paint_ms": ms(t_paint),
+                      "heavy_modules_loaded": [m for m in HEAVY_MODULES if m in sys.modules]}))
+    root.destroy()
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = App(root)
+    if "--startup-time" in sys.argv[1:]:
+        t_window = time.perf_counter()
+        root.after_idle(report_startup, root, t_window)
     root.mainloop()
\ No newline at end of file
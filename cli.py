@@ -0,0 +1,123 @@
+import os
+import sys
+import argparse
+from core import (CONTENT_MODES, SYNC_MODES, calc_range_current, calc_range_for_year, calc_range_span, span_weeks,
+                  resolve_identity, parse_range, empty_grid, pattern_for_run, Density, PixelJob, PushPacer, RunTrace)
+from banner import ALIGNS, text_cells
+
+# Headless runner: same pipeline as the GUI, driven by a pattern file and flags.
+#
+#   python cli.py --pattern heart.txt --repo ./art --remote https://github.com/me/art.git \
+#                 --token $GITHUB_TOKEN --year 2024 --levels 1,3,6,10
+#
+# Pattern file: 7 lines (Sun..Sat), one char per week column, 0-4 or '.' for empty; '#' lines are comments.
+# Binary patterns saved by the GUI (.gpat) and "gpat:…" share strings work too; they bring their own
+# period and density, which --year/--years and --levels/--range override.
+# With --years 2020-2024 the lines run across the whole span (one column per week) and it is a single run.
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="cli.py", description="Paint a pattern onto the GitHub contribution graph (no GUI).")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--pattern", help="text pattern file (7 rows × up to 53 columns), .gpat file or gpat: share string")
+    src.add_argument("--text", help="write this text across the graph instead (5×7 font, level 4)")
+    p.add_argument("--align", choices=ALIGNS, default="center", help="--text alignment")
+    p.add_argument("--repo", required=True, help="local repository path")
+    p.add_argument("--init", action="store_true", help="git init --repo if it is not a repository yet")
+    p.add_argument("--remote", required=True, help="HTTPS remote URL, e.g. https://github.com/OWNER/REPO.git")
+    p.add_argument("--token", default=os.environ.get("GITHUB_TOKEN"), help="personal access token (default: $GITHUB_TOKEN)")
+    p.add_argument("--name", help="commit author name (default: login from token)")
+    p.add_argument("--email", help="commit author email (default: no-reply email from token)")
+    period = p.add_mutually_exclusive_group()
+    period.add_argument("--year", type=int, help="paint a specific year instead of the last 53 weeks")
+    period.add_argument("--years", metavar="FIRST-LAST", help="paint several consecutive years in one run")
+    dens = p.add_mutually_exclusive_group()
+    dens.add_argument("--levels", help="fixed commits per level L1..L4 (default: the pattern's, else 1,3,6,10)")
+    dens.add_argument("--range", dest="range_", metavar="N|M-N", help="range mode instead of fixed level counts")
+    p.add_argument("--no-safe-mode", dest="safe_mode", action="store_false", help="push once at the end instead of in batches")
+    p.add_argument("--batch-weeks", type=int, default=2)
+    p.add_argument("--batch-delay", type=int, default=5, help="seconds between batch pushes")
+    p.add_argument("--no-pipeline", dest="pipeline", action="store_false",
+                   help="Safe Mode: commit, push, cool down strictly in sequence")
+    p.add_argument("--adaptive", action="store_true",
+                   help="Safe Mode: size batches by commits/bytes and tune the cooldown from measured pushes")
+    p.add_argument("--min-delay", type=float, default=0, help="--adaptive: shortest cooldown in seconds")
+    p.add_argument("--max-delay", type=float, default=60, help="--adaptive: longest cooldown in seconds")
+    p.add_argument("--batch-commits", type=int, default=200, help="--adaptive: commits in the first batch")
+    p.add_argument("--max-batch-mb", type=float, default=32, help="--adaptive: cap on the estimated batch size")
+    p.add_argument("--seed", type=int, help="seed for range-mode commit counts (reproducible runs)")
+    p.add_argument("--content", choices=CONTENT_MODES, default="rotate", help="what each commit writes")
+    p.add_argument("--no-fast-import", dest="fast_import", action="store_false", help="per-commit git add/commit fallback")
+    p.add_argument("--sync", choices=SYNC_MODES, default="branch",
+                   help="remote sync: ls-remote + target branch only (default), same but shallow, or full fetch")
+    p.add_argument("--sync-depth", type=int, default=50, help="fetch depth for --sync shallow (fresh repositories only; it makes them shallow)")
+    p.add_argument("--no-repack", dest="repack", action="store_false",
+                   help="leave per-commit loose objects unpacked before pushing")
+    p.add_argument("--delta", action="store_true",
+                   help="only add commits missing versus the existing history of this identity")
+    p.add_argument("--no-journal", dest="journal", action="store_false",
+                   help="don't record progress in .git/pixel-art-journal (no resume after a crash)")
+    p.add_argument("--verify", action="store_true",
+                   help="after pushing, recount the pushed history per day against the pattern (exit 3 on mismatch)")
+    p.add_argument("--trace", metavar="PATH", help="write a JSON trace (stage timings, git calls, batches) here")
+    p.add_argument("--profile", metavar="PATH", help="also dump a cProfile of the run here (pstats format)")
+    p.add_argument("--force-with-lease", action="store_true", help="answer yes if the remote is ahead")
+    p.add_argument("-q", "--quiet", action="store_true")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.years: start, end = calc_range_span(*parse_range(args.years))
+        else:          start, end = calc_range_for_year(args.year) if args.year else calc_range_current()
+        own_density = None
+        if args.text:
+            weeks = span_weeks(start, end)
+            grid = empty_grid(weeks)
+            cells, clipped = text_cells(args.text, weeks, args.align)
+            if clipped: print("warning: text is wider than the period and gets cut off", file=sys.stderr)
+            for y, x in cells: grid[y][x] = 4
+        else:
+            grid, start, own_density = pattern_for_run(args.pattern, start, end, bool(args.year or args.years))
+        if own_density and not (args.levels or args.range_): density = own_density
+        else: density = Density.from_spec(args.levels or "1,3,6,10", args.range_)
+        pacer = PushPacer(args.min_delay, args.max_delay, args.batch_commits,
+                          max_bytes=int(args.max_batch_mb * 2**20)) if args.adaptive else None
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr); return 2
+
+    if not os.path.isdir(os.path.join(args.repo, ".git")):
+        if not args.init:
+            print(f"error: {args.repo} is not a git repository (use --init)", file=sys.stderr); return 2
+        from git import Repo
+        Repo.init(args.repo)
+
+    try:
+        name, email = resolve_identity(args.token, args.name, args.email)
+    except Exception as e:
+        print(f"error: could not look up the token's account: {e}", file=sys.stderr); return 1
+    if not (name and email):
+        print("warning: Git identity is not set. Your contributions may not count.", file=sys.stderr)
+
+    status = (lambda text: None) if args.quiet else (lambda text: print(text, file=sys.stderr))
+    job = PixelJob(os.path.abspath(args.repo), args.remote, args.token, grid, start, density,
+                   name=name, email=email, safe_mode=args.safe_mode,
+                   batch_weeks=args.batch_weeks, batch_delay=args.batch_delay,
+                   fast_import=args.fast_import, content_mode=args.content, seed=args.seed,
+                   pipeline=args.pipeline, journal=args.journal, delta=args.delta, repack=args.repack,
+                   sync=args.sync, sync_depth=args.sync_depth, pacer=pacer,
+                   trace=RunTrace(args.trace, args.profile), verify=args.verify, status=status, confirm=lambda title, question: args.force_with_lease)
+    try:
+        job.run()
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr); return 1
+    check = job.last_check
+    if check and not check.ok:
+        print(check.summary(), file=sys.stderr)
+        for kind, cells in (("short", check.short), ("extra", check.extra)):
+            for y, x, want, got in cells:
+                print(f"  {kind} {job.grid.day(y, x)}: expected {want}, found {got}", file=sys.stderr)
+        return 3
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1283 @@
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import hashlib
+import math
+import zlib
+import base64
+import struct
+import queue
+import random
+import tempfile
+import subprocess
+import threading
+import contextlib
+import datetime as dt
+from array import array
+from collections import deque, Counter
+from urllib.parse import quote, urlsplit, urlunsplit
+from github_api import api_headers, get_user_login_id, create_private_repo
+
+# Headless core: everything the pipeline needs, no Tk. bot.py (GUI) and cli.py sit on top of this.
+# GitPython and NumPy are imported where they are first needed, so importing core (and opening the GUI)
+# stays cheap; `Repo` annotations are strings thanks to the __future__ import.
+
+_numpy = False
+
+def numpy(load: bool = True):
+    # NumPy if installed, else None. load=False: only if something already imported it (small jobs
+    # aren't worth the import)
+    global _numpy
+    if _numpy is False:
+        if not load and "numpy" not in sys.modules: return None
+        try: import numpy as np
+        except ImportError: np = None
+        _numpy = np
+    return _numpy
+
+ROWS, COLS = 7, 53
+
+DEFAULT_NAME  = "author"
+DEFAULT_EMAIL = "author@users.noreply.github.com"
+BOOTSTRAP_MESSAGE = "init"  # the root commit prepare_repo makes in an empty repository
+
+# ===== date helpers =====
+def sunday_of_week(d: dt.date) -> dt.date:
+    return d - dt.timedelta(days=(d.weekday() + 1) % 7)
+
+def saturday_of_week(d: dt.date) -> dt.date:
+    return sunday_of_week(d) + dt.timedelta(days=6)
+
+def calc_range_current():
+    today = dt.date.today()
+    end = saturday_of_week(today)
+    start = sunday_of_week(end) - dt.timedelta(weeks=COLS-1)
+    return start, end
+
+def calc_range_for_year(year: int):
+    last_day = dt.date(year, 12, 31)
+    end = saturday_of_week(last_day)
+    start = sunday_of_week(end) - dt.timedelta(weeks=COLS-1)
+    return start, end
+
+def calc_range_span(first_year: int, last_year: int):
+    # several years back to back: from the first year's window start to the last year's window end
+    if last_year < first_year: raise ValueError(f"bad year span {first_year}-{last_year}")
+    return calc_range_for_year(first_year)[0], calc_range_for_year(last_year)[1]
+
+def period_of(start_date: dt.date, end_date: dt.date):
+    # which period choice gives exactly these dates: ("current"|"year"|"span", first, last), or None
+    if (start_date, end_date) == calc_range_current(): return "current", None, None
+    first, last = (start_date + dt.timedelta(days=7)).year, (end_date - dt.timedelta(days=6)).year
+    if first == last and calc_range_for_year(first) == (start_date, end_date): return "year", first, last
+    if first < last and calc_range_span(first, last) == (start_date, end_date): return "span", first, last
+    return None
+
+def span_weeks(start_date: dt.date, end_date: dt.date) -> int:
+    return (end_date - start_date).days // 7 + 1
+
+def month_label_positions(start_date: dt.date, end_date: dt.date):
+    labels, weeks = [], span_weeks(start_date, end_date)
+    y, m = start_date.year, start_date.month
+    first = dt.date(y, m, 1)
+    if first < start_date:
+        m += 1
+        if m > 12: m = 1; y += 1
+    while True:
+        d = dt.date(y, m, 1)
+        if d > end_date: break
+        x = (d - start_date).days // 7
+        if 0 <= x < weeks:
+            labels.append((x, d.strftime("%b")))
+        m += 1
+        if m > 12: m = 1; y += 1
+    return labels
+
+# ===== GitHub API =====
+# api_headers / get_user_login_id / create_private_repo: pooled, cached client in github_api.py
+
+def build_noreply_email(login: str, uid: int):
+    return f"{uid}+{login}@users.noreply.github.com"
+
+def resolve_identity(token: str, name: str = None, email: str = None):
+    # fill whatever is missing from the token's account (login + no-reply email)
+    if token and not (name and email):
+        login, uid = get_user_login_id(token)
+        name = name or login
+        email = email or build_noreply_email(login, uid)
+    return name, email
+
+def auth_url(url: str, token: str) -> str:
+    if url and url.startswith("https://") and token:
+        return url.replace("https://", f"https://x-access-token:{quote(token, safe='')}@")
+    return url
+
+# ===== git fast-import =====
+def noon_utc_timestamp(day: dt.date) -> int:
+    return int(dt.datetime(day.year, day.month, day.day, 12, tzinfo=dt.timezone.utc).timestamp())
+
+def fast_import_commit(ref: str, ident: str, ts: int, message: str, files, parent=None) -> bytes:
+    # one `commit` command; files = [(path, bytes)] written inline, parent only for the first commit of a stream
+    msg = message.encode("utf-8")
+    out = [f"commit {ref}\n".encode(),
+           f"author {ident} {ts} +0000\n".encode("utf-8"),
+           f"committer {ident} {ts} +0000\n".encode("utf-8"),
+           f"data {len(msg)}\n".encode(), msg, b"\n"]
+    if parent: out.append(f"from {parent}\n".encode())
+    for path, data in files:
+        out += [f"M 100644 inline {path}\n".encode(), f"data {len(data)}\n".encode(), data, b"\n"]
+    out.append(b"\n")
+    return b"".join(out)
+
+# ===== commit content =====
+# "empty"  — no file at all (git commit --allow-empty)
+# "rotate" — pixels.txt keeps only the last ROTATE_LINES lines
+# "weekly" — one pixels/<sunday>.txt shard per week, appended within the week
+CONTENT_MODES = ("rotate", "weekly", "empty")
+ROTATE_LINES  = 32
+
+class PixelContent:
+    # produces the files each commit writes; every blob stays bounded in size
+    def __init__(self, mode: str, workdir: str):
+        if mode not in CONTENT_MODES: raise ValueError(f"unknown content mode: {mode}")
+        self.mode, self.workdir = mode, workdir
+        self.seq = 0
+        self.ring = None
+        self.shards = {}
+
+    def _read(self, rel: str) -> bytes:
+        try:
+            with open(os.path.join(self.workdir, rel), "rb") as f: return f.read()
+        except FileNotFoundError:
+            return b""
+
+    def next(self, day: dt.date, iso: str):
+        self.seq += 1
+        if self.mode == "empty":
+            return []
+        if self.mode == "rotate":
+            if self.ring is None:
+                self.ring = deque(self._read("pixels.txt").splitlines(keepends=True), maxlen=ROTATE_LINES)
+            self.ring.append(f"{iso} #{self.seq}\n".encode())
+            return [("pixels.txt", b"".join(self.ring))]
+        rel = f"pixels/{sunday_of_week(day):%Y-%m-%d}.txt"
+        if rel not in self.shards: self.shards[rel] = self._read(rel)
+        self.shards[rel] += f"{iso}\n".encode()
+        return [(rel, self.shards[rel])]
+
+    def write(self, files):
+        # per-commit path: put the files on disk, return the paths to `git add`
+        for rel, data in files:
+            full = os.path.join(self.workdir, rel)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "wb") as f: f.write(data)
+        return [rel for rel, _ in files]
+
+# ===== density =====
+def parse_range(txt: str):
+    # "N" or "M-N" -> (lo, hi); ValueError on anything else
+    if "-" in txt:
+        m, n = map(int, txt.split("-", 1))
+        if m < 1 or n < m: raise ValueError(txt)
+        return m, n
+    n = int(txt)
+    if n < 1: raise ValueError(txt)
+    return n, n
+
+class Density:
+    # fixed mode: exact commits per level L1..L4; range mode: levels binned inside min..max
+    def __init__(self, fixed=True, lv_counts=(1, 3, 6, 10), min_commits=1, max_commits=1):
+        self.fixed = fixed
+        self.lv_counts = [None] + [int(c) for c in lv_counts]
+        self.min_commits, self.max_commits = min_commits, max_commits
+
+    @classmethod
+    def from_spec(cls, levels: str = "1,3,6,10", range_: str = None):
+        # "1,3,6,10" fixed level counts, or range_ "N" / "M-N"
+        if range_:
+            lo, hi = parse_range(range_)
+            return cls(fixed=False, min_commits=lo, max_commits=hi)
+        counts = [int(c) for c in str(levels).split(",")]
+        if len(counts) != 4: raise ValueError("levels needs 4 comma-separated counts")
+        return cls(lv_counts=counts)
+
+    def level_bounds(self):
+        # [(lo, hi)] commits for L0..L4; fixed mode (or a single-value range) gives lo == hi
+        if self.fixed:
+            return [(0, 0)] + [(max(1, int(c)),) * 2 for c in self.lv_counts[1:]]
+        lo, hi = self.min_commits, self.max_commits
+        if hi < lo: hi = lo
+        if lo == hi: return [(0, 0)] + [(lo, lo)] * 4
+        span = hi - lo
+        b0 = lo
+        b1 = lo + math.ceil(span*1/4)
+        b2 = lo + math.ceil(span*2/4)
+        b3 = lo + math.ceil(span*3/4)
+        b4 = hi
+        lows  = [b0, b1, b2, b3]
+        highs = [b1, b2, b3, b4]
+        bounds = [(0, 0)]
+        for level in range(1, 5):
+            l = max(lows[level-1], lo)
+            bounds.append((l, max(l, highs[level-1])))
+        return bounds
+
+    def commits_for_level(self, level: int, rng=random) -> int:
+        if level <= 0: return 0
+        l, h = self.level_bounds()[level]
+        return l if l == h else rng.randint(l, h)
+
+    def level_for(self, commits: int, bounds=None) -> int:
+        # the level a day with this many commits reads as: the highest one whose lower bound it reaches
+        if commits <= 0: return 0
+        bounds = bounds or self.level_bounds()
+        return max([1] + [lv for lv in range(1, 5) if bounds[lv][0] <= commits])
+
+# ===== grid store =====
+class GridStore:
+    # painted levels for any run of whole weeks: one byte per day from `start` (a Sunday) in date order,
+    # which is column-major, i.e. commit order, so a day's slot is just (day - start).days.
+    # grid[y][x] reads and writes like the old 7×53 list of lists; rows() gives a plain copy.
+    def __init__(self, start: dt.date, weeks: int = COLS, data=None):
+        self.start, self.weeks = start, weeks
+        self.data = bytearray(weeks * ROWS) if data is None else bytearray(data)
+        if len(self.data) != weeks * ROWS: raise ValueError(f"grid data is not {weeks} weeks long")
+
+    @classmethod
+    def for_range(cls, start: dt.date, end: dt.date):
+        return cls(start, span_weeks(start, end))
+
+    @classmethod
+    def from_rows(cls, rows, start: dt.date):
+        store = cls(start, len(rows[0]) if rows else 0)
+        for y, row in enumerate(rows):
+            for x, level in enumerate(row):
+                if level: store.data[x * ROWS + y] = level
+        return store
+
+    def __len__(self):
+        return ROWS
+
+    def __getitem__(self, y: int):
+        if not 0 <= y < ROWS: raise IndexError("grid row out of range")
+        return _GridRow(self, y)
+
+    def __iter__(self):
+        return (_GridRow(self, y) for y in range(ROWS))
+
+    @property
+    def end(self) -> dt.date:
+        return self.start + dt.timedelta(days=len(self.data) - 1)
+
+    def day(self, y: int, x: int) -> dt.date:
+        return self.start + dt.timedelta(days=x * ROWS + y)
+
+    def slot(self, day: dt.date):
+        i = (day - self.start).days
+        return i if 0 <= i < len(self.data) else None
+
+    def level_on(self, day: dt.date) -> int:
+        i = self.slot(day)
+        return 0 if i is None else self.data[i]
+
+    def cells(self):
+        # (y, x, level) of every painted day, in commit order
+        for i, level in enumerate(self.data):
+            if level: yield i % ROWS, i // ROWS, level
+
+    def rows(self):
+        return [list(self.data[y::ROWS]) for y in range(ROWS)]
+
+    def copy(self):
+        return GridStore(self.start, self.weeks, self.data)
+
+    def resized(self, start: dt.date, weeks: int):
+        # same pattern from the first column on, for another period / width
+        out = GridStore(start, weeks)
+        n = min(weeks, self.weeks) * ROWS
+        out.data[:n] = self.data[:n]
+        return out
+
+class _GridRow:
+    __slots__ = ("store", "y")
+
+    def __init__(self, store: GridStore, y: int):
+        self.store, self.y = store, y
+
+    def _slot(self, x: int) -> int:
+        if x < 0: x += self.store.weeks
+        if not 0 <= x < self.store.weeks: raise IndexError("grid column out of range")
+        return x * ROWS + self.y
+
+    def __getitem__(self, x):
+        if isinstance(x, slice): return list(self.store.data[self.y::ROWS][x])
+        return self.store.data[self._slot(x)]
+
+    def __setitem__(self, x: int, level: int):
+        self.store.data[self._slot(x)] = level
+
+    def __len__(self):
+        return self.store.weeks
+
+    def __iter__(self):
+        return iter(self.store.data[self.y::ROWS])
+
+# ===== commit plan =====
+class CommitPlan:
+    # every painted day up front, in commit order (column by column, Sun..Sat):
+    # parallel compact arrays xs / ys / counts, with counts drawn once from an explicit seed.
+    # NumPy finds the painted days in one pass when installed; the counts always come from
+    # random.Random(seed) in commit order, so a seed gives the same plan with or without NumPy.
+    def __init__(self, start_date: dt.date, xs, ys, counts, seed: int):
+        self.start_date, self.seed = start_date, seed
+        self.xs, self.ys, self.counts = xs, ys, counts
+        self.total = int(sum(counts))
+
+    @classmethod
+    def build(cls, grid, start_date: dt.date, density: Density, seed: int = None):
+        # grid: a GridStore, or rows of levels (any number of week columns)
+        if seed is None: seed = random.SystemRandom().randrange(2**32)
+        store = grid if isinstance(grid, GridStore) else GridStore.from_rows(grid, start_date)
+        bounds = density.level_bounds()
+        rng = random.Random(seed)
+        np = numpy()
+        if np is not None:
+            days = np.frombuffer(bytes(store.data), dtype=np.uint8)
+            idx = np.flatnonzero(days)                   # store order is already the commit order
+            xs, ys = idx // ROWS, idx % ROWS
+            counts = array("I", (lo if lo == hi else rng.randint(lo, hi)
+                                 for lo, hi in map(bounds.__getitem__, days[idx].tolist())))
+            return cls(start_date, array("H", xs.tolist()), array("B", ys.tolist()), counts, seed)
+        xs, ys, counts = array("H"), array("B"), array("I")
+        for y, x, level in store.cells():
+            lo, hi = bounds[level]
+            xs.append(x); ys.append(y); counts.append(lo if lo == hi else rng.randint(lo, hi))
+        return cls(start_date, xs, ys, counts, seed)
+
+    def __len__(self):
+        return len(self.xs)
+
+    def day(self, i: int) -> dt.date:
+        return self.start_date + dt.timedelta(weeks=self.xs[i], days=self.ys[i])
+
+    def records(self, indices=None, done=None):
+        # (i, x, y, day, count) per painted day; `done` {i: commits already made} trims counts, skips finished days
+        for i in (range(len(self)) if indices is None else indices):
+            count = self.counts[i] - (done.get(i, 0) if done else 0)
+            if count > 0: yield i, self.xs[i], self.ys[i], self.day(i), count
+
+    def columns(self):
+        return sorted(set(self.xs))
+
+    def batches(self, weeks: int):
+        # indices grouped by runs of `weeks` active columns (Safe Mode batches)
+        cols = self.columns()
+        groups = [set(cols[i:i+weeks]) for i in range(0, len(cols), weeks)]
+        return [[i for i in range(len(self)) if self.xs[i] in g] for g in groups]
+
+def progress_text(counter) -> str:
+    done, total = counter["done"], counter["total"]
+    text = f"Committing: {done}/{total} commits"
+    elapsed, made = time.monotonic() - counter["t0"], done - counter.get("base", 0)
+    if 0 < made and elapsed > 0:
+        text += f" ({made / elapsed:.0f}/s"
+        text += f", ETA {math.ceil((total - done) * elapsed / made)}s)" if done < total else ")"
+    return text + "…"
+
+# ===== push pacing =====
+PUSH_REJECTED = ("[rejected]", "non-fast-forward", "fetch first", "stale info")
+
+def object_bytes(repo: Repo) -> int:
+    # loose + packed object bytes; the difference around a batch is roughly what its push sends
+    stats = dict(line.split(": ", 1) for line in repo.git.count_objects("-v").splitlines())
+    return (int(stats.get("size", 0)) + int(stats.get("size-pack", 0))) * 1024
+
+class PushPacer:
+    # adaptive Safe Mode: batches are cut by commit count (capped by an estimated byte size) while the
+    # run goes, and batch size and cooldown follow the last push: a fast one doubles the batch and halves
+    # the wait, a slow or failed one does the opposite, always within min_delay..max_delay
+    def __init__(self, min_delay=0, max_delay=60, batch_commits=200, max_commits=5000,
+                 max_bytes=32 * 2**20, target_seconds=10.0, retries=3):
+        if min_delay < 0 or max_delay < min_delay: raise ValueError("need 0 <= min delay <= max delay")
+        self.min_delay, self.max_delay = min_delay, max_delay
+        self.max_commits, self.max_bytes = max(1, max_commits), max_bytes
+        self.target_seconds, self.retries = target_seconds, max(0, retries)
+        self.size = max(1, min(batch_commits, self.max_commits))
+        self.delay = float(min_delay)
+        self.bytes_per_commit = None
+        self.history = []                                 # (commits, bytes, seconds) per push
+
+    def limit(self) -> int:
+        n = self.size
+        if self.bytes_per_commit and self.max_bytes: n = min(n, int(self.max_bytes // self.bytes_per_commit))
+        return max(1, n)
+
+    def cut(self, plan: CommitPlan, pending: deque, done) -> list:
+        # next batch off the front of `pending` (plan indices in commit order): whole days up to the limit
+        limit, n, batch = self.limit(), 0, []
+        while pending:
+            count = plan.counts[pending[0]] - done.get(pending[0], 0)
+            if batch and n + count > limit: break
+            batch.append(pending.popleft()); n += count
+        return batch
+
+    def pushed(self, commits: int, nbytes: int, seconds: float):
+        self.history.append((commits, nbytes, round(seconds, 3)))
+        if commits and nbytes:
+            bpc = nbytes / commits
+            self.bytes_per_commit = bpc if self.bytes_per_commit is None else (self.bytes_per_commit + bpc) / 2
+        if seconds < self.target_seconds / 2:
+            self.size = min(self.max_commits, self.size * 2)
+            self.delay = max(self.min_delay, self.delay / 2)
+        elif seconds > self.target_seconds:
+            self.slow_down()
+
+    def slow_down(self):
+        self.size = max(1, self.size // 2)
+        self.delay = min(self.max_delay, max(self.delay * 2, self.min_delay, 1.0))
+
+# ===== history =====
+def commits_per_day(repo_dir: str, email: str, rev: str = "HEAD") -> Counter:
+    # one streamed `git log` pass: author date -> number of commits by `email`
+    return scan_history(repo_dir, email, rev=rev)[0]
+
+def scan_history(repo_dir: str, email: str, start: dt.date = None, end: dt.date = None, rev: str = "HEAD"):
+    # one streamed `git log` pass over rev -> (Counter "YYYY-MM-DD" -> commits by `email` in start..end,
+    # commits by `email` outside the window, commits by anyone else inside it). The raw "date email" lines
+    # are counted by Counter itself (C speed, one entry per day, author and subject prefix), and only those
+    # distinct keys are decoded and classified, which keeps 100k+ commit histories at about the cost of git log.
+    # The bootstrap commit prepare_repo makes is not a pixel and is skipped (for delta and verify alike); it is
+    # spotted in the same pass by an empty parent list plus the subject cut one column past BOOTSTRAP_MESSAGE
+    lo, hi, email = str(start or ""), str(end or "9999"), email.lower()
+    width = len(BOOTSTRAP_MESSAGE) + 1
+    bootstrap = " " + BOOTSTRAP_MESSAGE.ljust(width)    # "%<(1,trunc)%P" is " " for a root commit, ".." otherwise
+    counts, outside, foreign = Counter(), 0, 0
+    proc = subprocess.Popen(["git", "-C", repo_dir, "log", f"--format=%ad %ae %<(1,trunc)%P%<({width},trunc)%s",
+                             "--date=short", rev], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    with proc: lines = Counter(proc.stdout)
+    if proc.returncode: raise RuntimeError(f"git log {rev} failed in {repo_dir}")
+    for line, n in lines.items():
+        day, who, tail = line.decode("utf-8", "replace").rstrip("\n").split(" ", 2)
+        if tail == bootstrap: continue
+        inside = lo <= day <= hi
+        if who.lower() != email: foreign += n if inside else 0
+        elif inside: counts[day] += n
+        else: outside += n
+    return counts, outside, foreign
+
+def is_shallow(repo: Repo) -> bool:
+    # through repo.git, so a traced repo counts the call
+    try: return repo.git.rev_parse("--is-shallow-repository").strip() == "true"
+    except Exception: return False
+
+def require_full_history(repo: Repo, what: str):
+    # per-day counts of a shallow repository stop at the cut: commits below it would look missing
+    if is_shallow(repo):
+        raise RuntimeError(f"{what} needs the full history, but {repo.working_tree_dir} is shallow "
+                           "(from --sync shallow); run `git fetch --unshallow origin` there first")
+
+def upstream_rev(repo: Repo) -> str:
+    # the remote-tracking branch HEAD pushes to (what the remote has), else HEAD; read from the config, no git call
+    try: tracking = repo.active_branch.tracking_branch()
+    except TypeError: return "HEAD"                      # detached HEAD
+    return tracking.name if tracking is not None and tracking.is_valid() else "HEAD"
+
+class HistoryCheck:
+    # the history recounted against the drawing: per grid day, the commits found vs. what its level
+    # needs (the run's exact plan counts if given, else the density's bounds for the level). `loose`: plan
+    # days checked against the bounds anyway, e.g. the days a delta run found painted and left alone.
+    # found[slot] / levels[slot] follow GridStore slots; short/extra list (y, x, expected, found)
+    def __init__(self, grid: GridStore, density: Density, counts, outside: int = 0, foreign: int = 0,
+                 plan: CommitPlan = None, loose=()):
+        self.grid, self.outside, self.foreign = grid, outside, foreign
+        n = len(grid.data)
+        self.found = array("I", bytes(4 * n))
+        for day, c in counts.items():
+            slot = grid.slot(dt.date.fromisoformat(day))
+            if slot is not None: self.found[slot] = c
+        exact = {}
+        if plan is not None:
+            for i in range(len(plan)):
+                if i in loose: continue
+                slot = grid.slot(plan.day(i))
+                if slot is not None: exact[slot] = plan.counts[i]
+        bounds = density.level_bounds()
+        self.levels, self.short, self.extra = bytearray(n), [], []
+        for slot, level in enumerate(grid.data):
+            c = self.found[slot]
+            lo, hi = (exact[slot],) * 2 if slot in exact else bounds[level]
+            if c: self.levels[slot] = density.level_for(c, bounds)
+            if c < lo:   self.short.append((slot % ROWS, slot // ROWS, lo, c))
+            elif c > hi: self.extra.append((slot % ROWS, slot // ROWS, hi, c))
+
+    @property
+    def ok(self) -> bool:
+        return not (self.short or self.extra)          # commits outside the period are reported, not failed
+
+    def summary(self) -> str:
+        total, days = sum(self.found), sum(1 for c in self.found if c)
+        head = f"Verified {total} commits on {days} days"
+        days_ = lambda n: f"{n} day{'s' * (n != 1)}"
+        problems = [f"{days_(len(self.short))} short" if self.short else "",
+                    f"{days_(len(self.extra))} with extra commits" if self.extra else "",
+                    f"{self.outside} commits outside the period" if self.outside else "",
+                    f"{self.foreign} commits by other identities" if self.foreign else ""]
+        problems = [p for p in problems if p]
+        return f"{head}: " + (", ".join(problems) if problems else "matches the drawing") + "."
+
+    def as_dict(self) -> dict:
+        return {"ok": self.ok, "commits": sum(self.found), "short": [list(c) for c in self.short],
+                "extra": [list(c) for c in self.extra], "outside": self.outside, "foreign": self.foreign}
+
+# ===== resume journal =====
+class PushJournal:
+    # crash-safe progress of one run, in .git/pixel-art-journal: append-only JSON lines, fsync'd per write.
+    #   {"run": key, "seed": s}            header (key = hash of grid, dates, density, identity)
+    #   {"c": [[i, n], ...], "head": sha}  plan day i now has n commits, branch tip after them
+    #   {"p": [i, ...], "sha": sha}        those days are on the remote
+    # Removed once the run completes; a torn last line (crash mid-write) is ignored.
+    NAME = "pixel-art-journal"
+
+    def __init__(self, git_dir: str):
+        self.path = os.path.join(git_dir, self.NAME)
+        self.lock = threading.Lock()
+
+    def load(self, key: str):
+        # -> (seed, done {i: n}, pushed {i}, head) for a journal of this run, else None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f: lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        seed, done, pushed, head = None, {}, set(), None
+        for line in lines:
+            try: e = json.loads(line)
+            except ValueError: continue
+            if "run" in e:
+                if e["run"] != key: return None
+                seed = e["seed"]
+            elif "c" in e:
+                done.update((int(i), int(n)) for i, n in e["c"]); head = e.get("head", head)
+            elif "p" in e:
+                pushed.update(int(i) for i in e["p"])
+        return (seed, done, pushed, head) if seed is not None else None
+
+    def _append(self, entry, mode="a"):
+        with self.lock, open(self.path, mode, encoding="utf-8") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            f.flush(); os.fsync(f.fileno())
+
+    def start(self, key: str, seed: int):
+        self._append({"run": key, "seed": seed}, mode="w")
+
+    def committed(self, pairs, head: str):
+        self._append({"c": [[i, n] for i, n in pairs], "head": head})
+
+    def pushed(self, indices, sha: str):
+        self._append({"p": list(indices), "sha": sha})
+
+    def finish(self):
+        try: os.remove(self.path)
+        except FileNotFoundError: pass
+
+# ===== patterns =====
+def empty_grid(cols: int = COLS):
+    return [[0 for _ in range(cols)] for _ in range(ROWS)]
+
+def parse_grid(text: str, cols: int = COLS):
+    # text pattern: ROWS lines (Sun..Sat), one char per week, 0-4 or '.'/' ' for empty
+    grid = empty_grid(cols)
+    lines = [ln for ln in text.splitlines() if ln.strip() and not ln.lstrip().startswith("#")]
+    if len(lines) != ROWS: raise ValueError(f"pattern needs {ROWS} rows, got {len(lines)}")
+    for y, line in enumerate(lines):
+        for x, ch in enumerate(line[:cols]):
+            if ch in ". ": continue
+            if ch not in "01234": raise ValueError(f"bad cell {ch!r} at row {y+1}, col {x+1}")
+            grid[y][x] = int(ch)
+    return grid
+
+def format_grid(grid) -> str:
+    return "".join("".join(str(v) if v else "." for v in row) + "\n" for row in grid)
+
+def load_grid(path: str, cols: int = COLS):
+    with open(path, "r", encoding="utf-8") as f: return parse_grid(f.read(), cols)
+
+# binary pattern: header (dims, start date, density) + levels at 3 bits per day in GridStore order,
+# zlib'd when that is smaller, + CRC32. The share string is the same bytes, base64url with a prefix.
+PATTERN_MAGIC = b"GPAT"
+PATTERN_VERSION = 1
+PATTERN_HEADER = struct.Struct("<4sBBIHB4HHH")   # magic, version, flags, start ordinal, weeks, rows, L1..L4, min, max
+PATTERN_FIXED, PATTERN_ZLIB = 1, 2
+SHARE_PREFIX = "gpat:"
+
+def pack_levels(data) -> bytes:
+    # levels 0..7, 3 bits each, little-endian bit order
+    np = numpy(load=False)
+    if np is not None:
+        a = np.frombuffer(bytes(data), dtype=np.uint8)
+        bits = (a[:, None] >> np.arange(3, dtype=np.uint8)) & 1
+        return np.packbits(bits.ravel(), bitorder="little").tobytes()
+    out = bytearray()
+    for i in range(0, len(data), 8):
+        chunk = data[i:i+8]
+        out += sum(v << 3*j for j, v in enumerate(chunk)).to_bytes(3, "little")[:(3 * len(chunk) + 7) // 8]
+    return bytes(out)
+
+def unpack_levels(payload: bytes, n: int) -> bytearray:
+    np = numpy(load=False)
+    if np is not None:
+        bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=3 * n, bitorder="little")
+        return bytearray((bits.reshape(n, 3) @ np.array([1, 2, 4], dtype=np.uint8)).astype(np.uint8).tobytes())
+    out = bytearray()
+    for i in range(0, n, 8):
+        v = int.from_bytes(payload[i // 8 * 3:i // 8 * 3 + 3], "little")
+        out += bytes((v >> 3*j) & 7 for j in range(min(8, n - i)))
+    return out
+
+def pack_pattern(grid: GridStore, density: Density = None) -> bytes:
+    # ValueError if the density doesn't fit the header (commit counts are 16-bit)
+    d = density or Density()
+    counts = [int(c) for c in d.lv_counts[1:]] + [int(d.min_commits), int(d.max_commits)]
+    if not all(0 <= c <= 0xFFFF for c in counts):
+        raise ValueError("a pattern file holds at most 65535 commits per day")
+    body = pack_levels(grid.data)
+    flags = PATTERN_FIXED if d.fixed else 0
+    packed = zlib.compress(body, 9)
+    if len(packed) < len(body): body, flags = packed, flags | PATTERN_ZLIB
+    head = PATTERN_HEADER.pack(PATTERN_MAGIC, PATTERN_VERSION, flags, grid.start.toordinal(), grid.weeks, ROWS,
+                               *counts)
+    return head + body + struct.pack("<I", zlib.crc32(head + body))
+
+def unpack_pattern(blob: bytes):
+    # -> (GridStore, Density); ValueError on anything that isn't a valid pattern
+    if len(blob) < PATTERN_HEADER.size + 4 or not blob.startswith(PATTERN_MAGIC): raise ValueError("not a pattern file")
+    if struct.unpack("<I", blob[-4:])[0] != zlib.crc32(blob[:-4]): raise ValueError("pattern is corrupted (CRC mismatch)")
+    magic, version, flags, start, weeks, rows, l1, l2, l3, l4, lo, hi = PATTERN_HEADER.unpack_from(blob)
+    if version != PATTERN_VERSION: raise ValueError(f"unsupported pattern version {version}")
+    if rows != ROWS: raise ValueError(f"pattern has {rows} rows, expected {ROWS}")
+    body = blob[PATTERN_HEADER.size:-4]
+    if flags & PATTERN_ZLIB: body = zlib.decompress(body)
+    n = weeks * ROWS
+    if len(body) != (3 * n + 7) // 8: raise ValueError("pattern size does not match its header")
+    data = unpack_levels(body, n)
+    if max(data, default=0) > 4: raise ValueError("pattern has levels above 4")
+    return GridStore(dt.date.fromordinal(start), weeks, data), Density(bool(flags & PATTERN_FIXED), (l1, l2, l3, l4), lo, hi)
+
+def share_string(grid: GridStore, density: Density = None) -> str:
+    return SHARE_PREFIX + base64.urlsafe_b64encode(pack_pattern(grid, density)).decode().rstrip("=")
+
+def from_share_string(text: str):
+    text = "".join(text.split())
+    if not text.startswith(SHARE_PREFIX): raise ValueError(f"share string must start with {SHARE_PREFIX!r}")
+    raw = text[len(SHARE_PREFIX):]
+    try: blob = base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4))
+    except ValueError as e: raise ValueError(f"bad share string: {e}")
+    return unpack_pattern(blob)
+
+def save_pattern(path: str, grid: GridStore, density: Density = None):
+    # atomic: autosave may run while a previous file is being read
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f: f.write(pack_pattern(grid, density))
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+
+def read_pattern(source: str, cols: int = COLS):
+    # a binary pattern file, a share string, or a text pattern -> (grid, start, density);
+    # start and density are None for text patterns, which carry neither
+    if source.startswith(SHARE_PREFIX):
+        store, density = from_share_string(source); return store, store.start, density
+    with open(source, "rb") as f: blob = f.read()
+    if blob.startswith(PATTERN_MAGIC):
+        store, density = unpack_pattern(blob); return store, store.start, density
+    return parse_grid(blob.decode("utf-8"), cols), None, None
+
+def pattern_for_run(source: str, start: dt.date, end: dt.date, fixed_period: bool):
+    # read a pattern and settle the run's start date: a binary pattern keeps its own period unless the
+    # caller chose one (then it is laid from the first week of that period, cut to its width)
+    grid, own_start, density = read_pattern(source, span_weeks(start, end))
+    if own_start is not None:
+        if fixed_period: grid = grid.resized(start, span_weeks(start, end))
+        else: start = own_start
+    return grid, start, density
+
+def autosave_path() -> str:
+    base = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(base, "github-pixel-art", "autosave.gpat")
+
+# ===== instrumentation =====
+def git_subcommand(command) -> str:
+    # ["git", "-c", "gc.auto=0", "push", ...] -> "push"
+    args = [command] if isinstance(command, str) else list(command)
+    i = 1 if args and os.path.basename(str(args[0])).startswith("git") else 0
+    while i < len(args):
+        a = str(args[i])
+        if a in ("-c", "-C"): i += 2; continue
+        if not a.startswith("-"): return a
+        i += 1
+    return "?"
+
+def redact_url(url: str) -> str:
+    # drop user:token@ from a remote URL before it goes into a log
+    try: u = urlsplit(url)
+    except ValueError: return url
+    return urlunsplit(u._replace(netloc=u.netloc.rsplit("@", 1)[-1])) if u.netloc else url
+
+class RunTrace:
+    # what a run spent its time on: wall time per pipeline stage, every git subprocess (count + time, per
+    # subcommand), and one record per pushed batch. Always collected (it's cheap); write() puts it into a
+    # JSON file when `path` is set, and `profile_path` additionally dumps a cProfile of the run's main thread
+    def __init__(self, path: str = None, profile_path: str = None):
+        self.path, self.profile_path = path, profile_path
+        self.lock = threading.Lock()
+        self.stages, self.git, self.batches, self.info = {}, {}, [], {}
+        self.started, self.t0, self.wall = None, None, None
+        self._git_class = None
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try: yield
+        finally: self._add(self.stages, name, time.perf_counter() - t0)
+
+    def _add(self, table, key, seconds):
+        with self.lock:
+            entry = table.setdefault(key, {"calls": 0, "seconds": 0.0})
+            entry["calls"] += 1; entry["seconds"] += seconds
+
+    def subprocess(self, command, seconds: float):
+        self._add(self.git, git_subcommand(command), seconds)
+
+    def attach(self, repo):
+        # route the repo's git calls through a counting subclass (Git uses __slots__, hence the class swap)
+        if self._git_class is None:
+            from git.cmd import Git
+            trace = self
+            class TracedGit(Git):
+                __slots__ = ()
+                def execute(self, command, *args, **kwargs):
+                    t0 = time.perf_counter()
+                    try: return super().execute(command, *args, **kwargs)
+                    finally: trace.subprocess(command, time.perf_counter() - t0)
+            self._git_class = TracedGit
+        repo.git.__class__ = self._git_class
+        return repo
+
+    def batch(self, **fields):
+        with self.lock: self.batches.append(fields)
+
+    def begin(self, **info):
+        self.started = dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")
+        self.t0 = time.perf_counter()
+        self.info.update(info)
+
+    @contextlib.contextmanager
+    def profiling(self):
+        if not self.profile_path:
+            yield; return
+        import cProfile
+        prof = cProfile.Profile()
+        try: prof.enable()
+        except ValueError:                               # another profiler is active (e.g. a parallel job)
+            yield; return
+        try: yield
+        finally:
+            prof.disable()
+            os.makedirs(os.path.dirname(os.path.abspath(self.profile_path)), exist_ok=True)
+            prof.dump_stats(self.profile_path)
+
+    def summary(self, **result):
+        if self.t0 is not None and self.wall is None: self.wall = time.perf_counter() - self.t0
+        r3 = lambda table: {k: {"calls": v["calls"], "seconds": round(v["seconds"], 3)} for k, v in sorted(table.items())}
+        with self.lock:
+            return {"started": self.started, "wall_s": round(self.wall or 0.0, 3), **result, **self.info,
+                    "stages": r3(self.stages),
+                    "git": {"calls": sum(v["calls"] for v in self.git.values()),
+                            "seconds": round(sum(v["seconds"] for v in self.git.values()), 3),
+                            "by_command": r3(self.git)},
+                    "batches": list(self.batches)}
+
+    def write(self, **result):
+        if not self.path: return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f: json.dump(self.summary(**result), f, indent=2)
+
+# ===== pipeline =====
+# remote sync: "branch" — ls-remote first, fetch only the target branch if it moved;
+# "shallow" — same, with a --depth limited fetch; "full" — fetch every ref with full history
+SYNC_MODES = ("branch", "shallow", "full")
+
+class PixelJob:
+    # one paint run: grid + dates + density -> commits in repo_path, pushed to remote_url.
+    # status(text) reports progress, confirm(title, question) -> bool answers the force-with-lease prompt.
+    def __init__(self, repo_path, remote_url, token, grid, start_date, density=None,
+                 name=None, email=None, safe_mode=True, batch_weeks=2, batch_delay=5,
+                 fast_import=True, content_mode="rotate", seed=None, pipeline=True, journal=True,
+                 delta=False, repack=True, sync="branch", sync_depth=50, pacer=None, trace=None,
+                 verify=False, status=None, confirm=None):
+        self.repo_path, self.remote_url, self.token = repo_path, remote_url, token
+        # grid: GridStore or rows of levels; several years of columns go into one plan / one run
+        self.grid = grid if isinstance(grid, GridStore) else GridStore.from_rows(grid, start_date)
+        self.start_date = start_date
+        self.density = density or Density()
+        self.git_user_name, self.git_user_email = name, email
+        self.safe_mode, self.batch_weeks, self.batch_delay = safe_mode, batch_weeks, batch_delay
+        self.pacer = pacer                                # PushPacer: adaptive batches instead of batch_weeks/delay
+        self.trace = trace or RunTrace()                  # RunTrace(path) also writes it out
+        self.fast_import, self.content_mode = fast_import, content_mode
+        self.seed, self.pipeline, self.use_journal, self.delta = seed, pipeline, journal, delta
+        self.repack = repack
+        if sync not in SYNC_MODES: raise ValueError(f"unknown sync mode: {sync}")
+        self.sync, self.sync_depth = sync, sync_depth
+        self.verify_after = verify                        # recount the pushed history at the end of run()
+        self.counter = self.last_plan = self.journal = self.last_check = None
+        self.done, self.pushed = {}, set()                # plan day -> commits made / days on the remote
+        self.satisfied = set()                            # delta mode: days the history already covers
+        self.status  = status or (lambda text: None)
+        self.confirm = confirm or (lambda title, question: False)
+
+    def identity(self):
+        return self.git_user_name or DEFAULT_NAME, self.git_user_email or DEFAULT_EMAIL
+
+    def plan(self, seed=None) -> CommitPlan:
+        return CommitPlan.build(self.grid, self.start_date, self.density, self.seed if seed is None else seed)
+
+    def run_key(self) -> str:
+        d = self.density
+        spec = [self.grid.rows(), str(self.start_date), d.fixed, d.lv_counts[1:], d.min_commits, d.max_commits, self.identity()]
+        return hashlib.sha1(json.dumps(spec).encode()).hexdigest()
+
+    def resume_or_plan(self, repo: Repo) -> CommitPlan:
+        # pick up a crashed run of the same job from its journal, or start a fresh one
+        self.done, self.pushed = {}, set()
+        if not self.use_journal:
+            return self.plan()
+        self.journal = PushJournal(repo.git_dir)
+        key = self.run_key()
+        state = self.journal.load(key)
+        if state and (self.seed is None or self.seed == state[0]):
+            seed, done, pushed, head = state
+            try:
+                if head: repo.git.merge_base("--is-ancestor", head, "HEAD")
+                plan = self.plan(seed)
+                self.done, self.pushed = done, pushed
+                self.status(f"Resuming: {sum(done.values())} commits already made, {len(pushed)} days pushed.")
+                return plan
+            except Exception:
+                self.status("Journal does not match this branch any more; starting over.")
+        plan = self.plan()
+        if len(plan): self.journal.start(key, plan.seed)
+        return plan
+
+    def apply_delta(self, repo: Repo, plan: CommitPlan):
+        # count what the history already has for this identity; only the difference gets committed.
+        # A day whose count already reaches its level's lower bound is left alone: in range mode every run
+        # draws new counts, and topping up to each new draw would add commits on every rerun
+        require_full_history(repo, "Delta mode")
+        t0 = time.perf_counter()
+        have = commits_per_day(repo.working_tree_dir, self.identity()[1])
+        self.trace.subprocess(["git", "log"], time.perf_counter() - t0)
+        bounds = self.density.level_bounds()
+        for i in range(len(plan)):
+            n = have.get(str(plan.day(i)), 0)
+            if n >= bounds[self.grid.data[plan.xs[i] * ROWS + plan.ys[i]]][0]: n = plan.counts[i]
+            n = min(plan.counts[i], n)
+            if n > self.done.get(i, 0): self.done[i] = n
+            if self.done.get(i, 0) >= plan.counts[i]: self.satisfied.add(i)
+        missing = plan.total - sum(self.done.values())
+        self.status(f"Delta: {plan.total - missing} of {plan.total} commits already in history, {missing} to add.")
+
+    def verify(self, rev: str = None) -> HistoryCheck:
+        # recount the pushed branch (its upstream, else HEAD) per day in one `git log` pass, against the grid.
+        # Days this run committed must match its plan exactly; days a delta run left alone only their level
+        self.status("Verifying pushed history…")
+        with self.trace.stage("verify"):
+            from git import Repo
+            repo = self.trace.attach(Repo(self.repo_path))
+            require_full_history(repo, "Verify")
+            rev = rev or upstream_rev(repo)
+            t0 = time.perf_counter()
+            counts, outside, foreign = scan_history(self.repo_path, self.identity()[1], self.grid.start, self.grid.end, rev)
+            self.trace.subprocess(["git", "log"], time.perf_counter() - t0)
+            check = self.last_check = HistoryCheck(self.grid, self.density, counts, outside, foreign,
+                                                   plan=self.last_plan, loose=self.satisfied)
+        self.status(check.summary())
+        return check
+
+    def mark_committed(self, repo: Repo, pairs):
+        # pairs: (i, commits just made for day i)
+        for i, n in pairs: self.done[i] = self.done.get(i, 0) + n
+        if self.journal: self.journal.committed([(i, self.done[i]) for i, _ in pairs], repo.head.commit.hexsha)
+
+    def mark_pushed(self, indices, sha: str):
+        self.pushed.update(indices)
+        if self.journal: self.journal.pushed(indices, sha)
+
+    def prepare_repo(self) -> Repo:
+        from git import Repo
+        repo = self.trace.attach(Repo(self.repo_path))
+        name, email = self.identity()
+
+        # identity + silence credential helper
+        try:
+            with repo.config_writer() as cw:
+                cw.set_value("user","name", name)
+                cw.set_value("user","email", email)
+                cw.set_value("credential","helper","")
+        except Exception:
+            repo.git.config("user.name", name)
+            repo.git.config("user.email", email)
+            try: repo.git.config("credential.helper","")
+            except Exception: pass
+
+        # origin with token
+        url = auth_url(self.remote_url, self.token)
+        if "origin" not in [r.name for r in repo.remotes]:
+            repo.create_remote("origin", url)
+        else:
+            try: repo.remote("origin").set_url(url)
+            except Exception: repo.git.remote("set-url","origin", url)
+
+        # we pack per batch ourselves; no surprise `gc --auto` halfway through the commit loop
+        if self.repack: repo.git.set_persistent_git_options(c="gc.auto=0")
+
+        # initial commit
+        if not repo.head.is_valid():
+            with open(os.path.join(self.repo_path, "pixels.txt"),"w",encoding="utf-8") as f: f.write("init\n")
+            repo.git.add("pixels.txt"); repo.git.commit("-m", BOOTSTRAP_MESSAGE)
+        return repo
+
+    def checkout_branch(self, repo: Repo) -> str:
+        try: branch = repo.active_branch.name
+        except Exception:
+            repo.git.checkout("-b","main"); branch = "main"
+        if branch == "master":
+            try: repo.git.branch("-M","main"); branch = "main"
+            except Exception: pass
+        return branch
+
+    def sync_with_remote(self, repo: Repo, branch: str):
+        if self.sync == "full": return self.sync_full(repo, branch)
+        try: out = repo.git.ls_remote("origin", f"refs/heads/{branch}")
+        except Exception:
+            return
+        if not out.strip(): return                        # branch not on the remote yet
+        tip = out.split()[0]
+        try:
+            repo.git.merge_base("--is-ancestor", tip, "HEAD")
+            # remote has nothing new: just point the tracking ref at it, no fetch
+            repo.git.update_ref(f"refs/remotes/origin/{branch}", tip)
+            try: repo.git.branch("--set-upstream-to", f"origin/{branch}", branch)
+            except Exception: pass
+            return
+        except Exception:
+            pass                                           # unknown commit or diverged: fetch it
+        args = ["origin", f"+refs/heads/{branch}:refs/remotes/origin/{branch}"]
+        if self.sync == "shallow" and self.may_fetch_shallow(repo, branch):
+            args.insert(0, f"--depth={max(1, int(self.sync_depth))}")
+        try: repo.git.fetch(*args)
+        except Exception:
+            return
+        self.integrate_remote(repo, branch)
+
+    def may_fetch_shallow(self, repo: Repo, branch: str) -> bool:
+        # a depth-limited fetch makes the whole repository shallow for good, so only do it for the first
+        # fetch (afterwards negotiation sends just the new commits, and a shallow cut there would hide the
+        # merge base from --ff-only), into a repository with no history of its own beyond the bootstrap
+        # commit, and not when this run counts history per day (delta, verify)
+        if self.delta or self.verify_after: return False
+        return not self.has_ref(repo, f"refs/remotes/origin/{branch}") and self.only_bootstrap(repo)
+
+    def only_bootstrap(self, repo: Repo) -> bool:
+        # nothing in the branch but prepare_repo's root commit
+        return not self.has_ref(repo, "HEAD~1") and repo.head.commit.message.strip() == BOOTSTRAP_MESSAGE
+
+    @staticmethod
+    def has_ref(repo: Repo, ref: str) -> bool:
+        try: repo.git.rev_parse("--verify", "-q", ref); return True
+        except Exception: return False
+
+    def sync_full(self, repo: Repo, branch: str):
+        try:
+            remote = repo.remote("origin"); remote.fetch()
+        except Exception:
+            return
+        remote_branches = {ref.name.split("/",1)[1] for ref in remote.refs if "/" in ref.name}
+        if branch not in remote_branches:
+            return
+        self.integrate_remote(repo, branch)
+
+    def integrate_remote(self, repo: Repo, branch: str):
+        try: repo.git.branch("--set-upstream-to", f"origin/{branch}", branch)
+        except Exception: pass
+        if self.only_bootstrap(repo):
+            # a fresh repository has nothing of its own to keep: take the remote branch as it is (merging the
+            # unrelated bootstrap commit in can't work against a shallow fetch anyway)
+            try: repo.git.reset("--hard", f"origin/{branch}"); return
+            except Exception: pass
+        try:
+            repo.git.merge("--ff-only", f"origin/{branch}"); return
+        except Exception:
+            pass
+        try:
+            repo.git.merge("--no-edit", "--allow-unrelated-histories", f"origin/{branch}")
+        except Exception:
+            try: repo.git.merge("--abort")
+            except Exception: pass
+            try: repo.git.rebase(f"origin/{branch}")
+            except Exception:
+                # leave a clean checkout; the push then asks about force-with-lease
+                try: repo.git.rebase("--abort")
+                except Exception: pass
+
+    def make_commits(self, repo: Repo, records, counter, content: PixelContent):
+        # records: (i, x, y, day, count) from CommitPlan.records()
+        with self.trace.stage("commit"):
+            if self.fast_import: self.fast_import_commits(repo, records, counter, content)
+            else:                self.commit_one_by_one(repo, records, counter, content)
+
+    def commit_one_by_one(self, repo: Repo, records, counter, content: PixelContent):
+        name, email = self.identity()
+        for i, x, y, day, count in records:
+            for _ in range(count):
+                env = os.environ.copy()
+                env["GIT_AUTHOR_NAME"] = name
+                env["GIT_AUTHOR_EMAIL"] = email
+                env["GIT_COMMITTER_NAME"] = env["GIT_AUTHOR_NAME"]
+                env["GIT_COMMITTER_EMAIL"] = env["GIT_AUTHOR_EMAIL"]
+                iso = day.strftime("%Y-%m-%dT12:00:00+00:00")
+                env["GIT_AUTHOR_DATE"] = iso; env["GIT_COMMITTER_DATE"] = iso
+                paths = content.write(content.next(day, iso))
+                if paths: repo.git.add(*paths)
+                repo.git.commit("--allow-empty", "-m", f"Pixel {x},{y}", env=env)
+                self.mark_committed(repo, [(i, 1)])
+            counter["done"] += count
+            self.status(progress_text(counter))
+
+    def fast_import_commits(self, repo: Repo, records, counter, content: PixelContent):
+        ident = "{} <{}>".format(*self.identity())
+        ref, parent = repo.head.ref.path, repo.head.commit.hexsha
+        n, made = 0, []
+        with tempfile.TemporaryFile() as stream:
+            for i, x, y, day, count in records:
+                made.append((i, count))
+                iso = day.strftime("%Y-%m-%dT12:00:00+00:00")
+                ts = noon_utc_timestamp(day)
+                for _ in range(count):
+                    stream.write(fast_import_commit(ref, ident, ts, f"Pixel {x},{y}\n",
+                                                    content.next(day, iso), parent if n == 0 else None))
+                    n += 1
+            if n == 0: return
+            stream.seek(0)
+            self.status(f"Writing {n} commits (git fast-import)…")
+            repo.git.fast_import("--quiet", istream=stream)
+        counter["done"] += n
+        self.status(progress_text(counter))
+        # branch moved under the checkout: bring index + working tree along
+        repo.git.read_tree("-m", "-u", parent, ref)
+        self.mark_committed(repo, made)
+
+    def pack_loose(self, repo: Repo):
+        # fold a batch's loose objects into one pack, so push enumerates a few packs instead of thousands of
+        # files. Both backends need it: the per-commit path writes only loose objects, and fast-import unpacks
+        # its output into loose objects too when a batch has fewer than fastimport.unpackLimit objects
+        if not self.repack: return
+        with self.trace.stage("pack"): self.repack_if_loose(repo)
+
+    def repack_if_loose(self, repo: Repo):
+        stats = dict(line.split(": ", 1) for line in repo.git.count_objects("-v").splitlines())
+        loose = int(stats.get("count", 0))
+        if loose:
+            self.status(f"Packing {loose} loose objects…")
+            repo.git.repack("-d", "-q")
+
+    def push(self, repo: Repo, branch: str, upstream: bool = False, rev: str = None):
+        # rev: push that commit instead of the branch tip (the tip may already be moving on)
+        with self.trace.stage("push"): self.push_spec(repo, branch, upstream, rev)
+
+    def push_spec(self, repo: Repo, branch: str, upstream: bool, rev: str):
+        spec = f"{rev}:refs/heads/{branch}" if rev else branch
+        try:
+            if upstream and not rev: repo.git.push("-u","origin",spec)
+            else:                    repo.git.push("origin",spec)
+        except Exception:
+            if not self.confirm("Push issue","Remote ahead. Force-with-lease?"): raise
+            repo.git.push("--force-with-lease","origin",spec)
+        if upstream and rev:
+            try: repo.git.branch("--set-upstream-to", f"origin/{branch}", branch)
+            except Exception: pass
+
+    def pending_batches(self, plan: CommitPlan):
+        # Safe Mode batches still needing a push (a resumed run skips the ones already on the remote)
+        # and, in delta mode, the ones whose days the history already covers
+        batches = plan.batches(max(1, int(self.batch_weeks)))
+        return [b for b in batches if not (self.pushed | self.satisfied).issuperset(b)], len(batches)
+
+    def commit_batch(self, repo: Repo, plan: CommitPlan, batch, counter, content: PixelContent) -> dict:
+        # commit + pack one batch; returns its trace record (the push side fills in the rest)
+        commits = sum(plan.counts[i] - self.done.get(i, 0) for i in batch)
+        before, t0 = object_bytes(repo), time.perf_counter()
+        self.make_commits(repo, plan.records(batch, self.done), counter, content)
+        self.pack_loose(repo)
+        return {"days": len(batch), "commits": commits, "commit_s": round(time.perf_counter() - t0, 3),
+                "pack_bytes": max(0, object_bytes(repo) - before), "sha": repo.head.commit.hexsha}
+
+    def timed_push(self, rec: dict, repo: Repo, branch: str, upstream: bool = False, rev: str = None):
+        t0 = time.perf_counter()
+        self.push(repo, branch, upstream=upstream, rev=rev)
+        rec["push_s"] = round(time.perf_counter() - t0, 3)
+
+    def cool_down(self, rec: dict, seconds: float, text: str):
+        self.status(text)
+        with self.trace.stage("cooldown"): time.sleep(seconds)
+        rec["cooldown_s"] = round(seconds, 3)
+
+    def push_batches_sequential(self, repo: Repo, branch: str, plan: CommitPlan, counter, content: PixelContent):
+        batches, _ = self.pending_batches(plan)
+        for idx, batch in enumerate(batches, start=1):
+            self.status(f"Batch {idx}/{len(batches)}: weeks {plan.xs[batch[0]]}…{plan.xs[batch[-1]]}")
+            rec = self.commit_batch(repo, plan, batch, counter, content)
+            self.timed_push(rec, repo, branch, upstream=(idx == 1))
+            self.mark_pushed(batch, rec["sha"])
+            delay = max(0, int(self.batch_delay))
+            if idx < len(batches) and delay > 0:
+                self.cool_down(rec, delay, f"Pushed batch {idx}. Cooling down {delay}s…")
+            self.trace.batch(batch=idx, **rec)
+
+    def push_batches_pipelined(self, repo: Repo, branch: str, plan: CommitPlan, counter, content: PixelContent):
+        # same batches and delays as the sequential loop, but this thread commits batch N+1
+        # while a pusher thread pushes batch N (by sha) and sits out its cooldown
+        batches, _ = self.pending_batches(plan)
+        delay = max(0, int(self.batch_delay))
+        ready, failed = queue.Queue(maxsize=1), []
+
+        def pusher():
+            from git import Repo
+            push_repo = self.trace.attach(Repo(self.repo_path))
+            while True:
+                item = ready.get()
+                if item is None: return
+                if failed: continue                      # keep draining so the producer never blocks
+                idx, rec = item
+                try:
+                    self.timed_push(rec, push_repo, branch, upstream=(idx == 1), rev=rec["sha"])
+                    self.mark_pushed(batches[idx-1], rec["sha"])
+                    if idx < len(batches) and delay > 0:
+                        self.cool_down(rec, delay, f"Pushed batch {idx}. Cooling down {delay}s…")
+                    self.trace.batch(batch=idx, **rec)
+                except Exception as e:
+                    failed.append(e)
+
+        worker = threading.Thread(target=pusher, daemon=True); worker.start()
+        try:
+            for idx, batch in enumerate(batches, start=1):
+                if failed: break
+                self.status(f"Batch {idx}/{len(batches)}: weeks {plan.xs[batch[0]]}…{plan.xs[batch[-1]]}")
+                ready.put((idx, self.commit_batch(repo, plan, batch, counter, content)))
+        finally:
+            ready.put(None); worker.join()
+        if failed: raise failed[0]
+
+    def push_retrying(self, repo: Repo, branch: str, upstream: bool) -> float:
+        # transient failures back off and retry; a rejection goes straight to push()'s force-with-lease prompt.
+        # returns the duration of the push that went through
+        from git import GitCommandError
+        for _ in range(self.pacer.retries):
+            t0 = time.monotonic()
+            try:
+                with self.trace.stage("push"):
+                    repo.git.push(*(("-u",) if upstream else ()), "origin", branch)
+                return time.monotonic() - t0
+            except GitCommandError as e:
+                if any(s in str(e.stderr) for s in PUSH_REJECTED): break
+                self.pacer.slow_down()
+                self.status(f"Push failed; retrying in {self.pacer.delay:.0f}s…")
+                with self.trace.stage("retry_wait"): time.sleep(self.pacer.delay)
+        t0 = time.monotonic()
+        self.push(repo, branch, upstream=upstream)
+        return time.monotonic() - t0
+
+    def push_batches_adaptive(self, repo: Repo, branch: str, plan: CommitPlan, counter, content: PixelContent):
+        # each batch is cut after the previous push has been measured, so this one runs strictly in sequence
+        pacer, skip = self.pacer, self.pushed | self.satisfied
+        pending = deque(i for i in range(len(plan)) if i not in skip)
+        idx = 0
+        while pending:
+            batch = pacer.cut(plan, pending, self.done)
+            idx += 1
+            commits = sum(plan.counts[i] - self.done.get(i, 0) for i in batch)
+            self.status(f"Batch {idx} ({commits} commits): weeks {plan.xs[batch[0]]}…{plan.xs[batch[-1]]}")
+            rec = self.commit_batch(repo, plan, batch, counter, content)
+            seconds = self.push_retrying(repo, branch, upstream=(idx == 1))
+            rec["push_s"] = round(seconds, 3)
+            pacer.pushed(commits, rec["pack_bytes"], seconds)
+            self.mark_pushed(batch, rec["sha"])
+            if pending and pacer.delay > 0:
+                self.cool_down(rec, pacer.delay, f"Pushed batch {idx} in {seconds:.1f}s. Cooling down {pacer.delay:.0f}s…")
+            self.trace.batch(batch=idx, **rec)
+
+    def run(self) -> int:
+        # full pipeline; returns the number of planned commits (0 = nothing to do).
+        # the trace is written whether the run succeeds or not
+        self.trace.begin(repo=self.repo_path, remote=redact_url(self.remote_url), safe_mode=self.safe_mode,
+                         pipeline=self.pipeline, adaptive=bool(self.pacer), fast_import=self.fast_import,
+                         content=self.content_mode, sync=self.sync, delta=self.delta, repack=self.repack)
+        result = {"ok": False}
+        try:
+            with self.trace.profiling():
+                total = self.run_stages()
+            result = {"ok": True, "commits": total}
+            if self.last_check: result["verify"] = self.last_check.as_dict()
+            return total
+        except Exception as e:
+            result["error"] = str(e); raise
+        finally:
+            if self.last_plan is not None:
+                result["plan"] = {"days": len(self.last_plan), "commits": self.last_plan.total, "seed": self.last_plan.seed}
+            try: self.trace.write(**result)
+            except OSError as e: self.status(f"Could not write trace: {e}")
+
+    def run_stages(self) -> int:
+        self.status("Preparing repository…")
+        with self.trace.stage("prepare"): repo = self.prepare_repo()
+
+        with self.trace.stage("plan"): plan = self.last_plan = self.resume_or_plan(repo)
+        if not len(plan):
+            self.status("Nothing selected."); return 0
+        self.status(f"Plan: {plan.total} commits on {len(plan)} days (seed {plan.seed})")
+        content = PixelContent(self.content_mode, self.repo_path)
+
+        with self.trace.stage("checkout"): branch = self.checkout_branch(repo)
+        with self.trace.stage("sync"): self.sync_with_remote(repo, branch)
+        if self.delta:
+            with self.trace.stage("delta"): self.apply_delta(repo, plan)
+        base = sum(self.done.values())
+        counter = self.counter = {"done":base,"base":base,"total":plan.total,"t0":time.monotonic()}
+
+        if self.safe_mode and not self.pending_batches(plan)[0]:
+            self.status("Pushing…")                       # nothing left to commit; publish whatever is local
+            self.push(repo, branch, upstream=True)
+        elif self.safe_mode and self.pacer:
+            self.push_batches_adaptive(repo, branch, plan, counter, content)
+        elif self.safe_mode and self.pipeline:
+            self.push_batches_pipelined(repo, branch, plan, counter, content)
+        elif self.safe_mode:
+            self.push_batches_sequential(repo, branch, plan, counter, content)
+        else:
+            self.status("Creating commits…")
+            rec = self.commit_batch(repo, plan, range(len(plan)), counter, content)
+            self.status("Pushing…")
+            self.timed_push(rec, repo, branch, upstream=True)
+            self.mark_pushed(range(len(plan)), rec["sha"])
+            self.trace.batch(batch=1, **rec)
+
+        if self.journal: self.journal.finish()
+        self.status("Done! Commits pushed.")
+        if self.verify_after: self.verify()
+        return plan.total
@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+# Shared GitHub API client: one pooled Session (keep-alive, no TLS handshake per call), a small
+# on-disk cache of GET responses keyed by token hash + URL and revalidated with ETag/If-None-Match
+# (a 304 doesn't count against the rate limit), and back-off on rate-limit responses.
+# `requests` is imported when the first client is built, not when this module is.
+
+API = "https://api.github.com"
+CACHE_MAX_ENTRIES = 64
+MAX_RATE_WAIT = 60          # seconds we're willing to sleep for a rate-limit reset
+RATE_RETRIES = 3
+
+def api_headers(token: str):
+    return {"Accept":"application/vnd.github+json","Authorization":f"token {token}",
+            "X-GitHub-Api-Version":"2022-11-28","User-Agent":"pixel-art-bot"}
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "github-pixel-art", "api")
+
+class GitHubClient:
+    def __init__(self, cache_dir: str = None, max_rate_wait: int = MAX_RATE_WAIT):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self.max_rate_wait = max_rate_wait
+        self.lock = threading.Lock()
+        self.blocked_until = 0.0                       # set when a response says the quota is used up
+
+    # ---------- cache ----------
+    def _cache_path(self, token: str, url: str) -> str:
+        tok = hashlib.sha256((token or "").encode()).hexdigest()
+        return os.path.join(self.cache_dir, hashlib.sha256(f"{tok} {url}".encode()).hexdigest() + ".json")
+
+    def _cache_get(self, token: str, url: str):
+        if not self.cache_dir: return None
+        try:
+            with open(self._cache_path(token, url), "r", encoding="utf-8") as f: return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _cache_put(self, token: str, url: str, etag: str, body):
+        if not (self.cache_dir and etag): return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f: json.dump({"etag": etag, "body": body}, f)
+            os.replace(tmp, self._cache_path(token, url))
+            entries = sorted((e for e in os.scandir(self.cache_dir) if e.name.endswith(".json")),
+                             key=lambda e: e.stat().st_mtime)
+            for e in entries[:-CACHE_MAX_ENTRIES]: os.remove(e.path)
+        except OSError:
+            pass
+
+    # ---------- requests ----------
+    def _rate_wait(self, r) -> float:
+        # seconds until we may retry, or None if this isn't a rate-limit response
+        if r.status_code not in (403, 429): return None
+        if r.headers.get("Retry-After"): return float(r.headers["Retry-After"])
+        if r.headers.get("X-RateLimit-Remaining") == "0" and r.headers.get("X-RateLimit-Reset"):
+            return max(0.0, float(r.headers["X-RateLimit-Reset"]) - time.time()) + 1
+        return None
+
+    def request(self, method: str, path: str, token: str, timeout=15, headers=None, **kwargs):
+        url = path if "://" in path else API + path
+        hdrs = {**api_headers(token), **(headers or {})}
+        for attempt in range(RATE_RETRIES + 1):
+            with self.lock: pause = self.blocked_until - time.time()
+            if 0 < pause <= self.max_rate_wait: time.sleep(pause)
+            r = self.session.request(method, url, headers=hdrs, timeout=timeout, **kwargs)
+            if r.headers.get("X-RateLimit-Remaining") == "0" and r.headers.get("X-RateLimit-Reset"):
+                with self.lock: self.blocked_until = float(r.headers["X-RateLimit-Reset"]) + 1
+            wait = self._rate_wait(r)
+            if wait is None or attempt == RATE_RETRIES or wait > self.max_rate_wait: return r
+            time.sleep(wait)
+        return r
+
+    def get_json(self, path: str, token: str, timeout=15):
+        url = path if "://" in path else API + path
+        cached = self._cache_get(token, url)
+        headers = {"If-None-Match": cached["etag"]} if cached else None
+        r = self.request("GET", url, token, timeout=timeout, headers=headers)
+        if r.status_code == 304 and cached: return cached["body"]
+        r.raise_for_status()
+        body = r.json()
+        self._cache_put(token, url, r.headers.get("ETag"), body)
+        return body
+
+    def post_json(self, path: str, token: str, payload, timeout=20):
+        r = self.request("POST", path, token, timeout=timeout, json=payload); r.raise_for_status()
+        return r.json()
+
+_client = None
+_client_lock = threading.Lock()
+
+def client() -> GitHubClient:
+    global _client
+    with _client_lock:
+        if _client is None: _client = GitHubClient()
+        return _client
+
+def get_user_login_id(token: str):
+    j = client().get_json("/user", token)
+    return j["login"], j["id"]
+
+def create_private_repo(token: str, name: str, description: str = "", owner: str = None):
+    payload = {"name": name, "description": description, "private": True, "auto_init": False}
+    return client().post_json(f"/orgs/{owner}/repos" if owner else "/user/repos", token, payload)
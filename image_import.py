@@ -0,0 +1,102 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Image -> grid levels: decode once, box-average down to ROWS × weeks, quantize into levels 0..4.
+# "Ink" is darkness × alpha (a dark logo on white/transparent paints; invert for light-on-dark art).
+# Resampling is a summed-area table with NumPy (or Pillow's BOX resize without it); dithering is an
+# ordered Bayer pattern, so both are whole-array operations. Resampled cells are cached per size, so
+# moving a threshold only re-quantizes a 7×N array — cheap enough for a live canvas preview.
+
+DEFAULT_THRESHOLDS = (0.2, 0.4, 0.6, 0.8)       # ink needed for levels 1..4
+BAYER4 = ((0, 8, 2, 10), (12, 4, 14, 6), (3, 11, 1, 9), (15, 7, 13, 5))
+
+def available() -> bool:
+    return Image is not None
+
+def fit_width(w: int, h: int, rows: int, cols: int) -> int:
+    # columns the image covers at its own aspect ratio (square cells), at most cols
+    return max(1, min(cols, round(w * rows / h))) if h else cols
+
+def box_resample(a, rows: int, cols: int):
+    # area average of a 2-D float array onto rows × cols (down- or up-sampling) via a summed-area table
+    h, w = a.shape
+    sat = np.zeros((h + 1, w + 1), dtype=np.float64)
+    sat[1:, 1:] = a.cumsum(0).cumsum(1)
+    def edges(n, size):
+        e = np.linspace(0, size, n + 1)
+        lo = np.minimum(np.floor(e[:-1]).astype(np.int64), size - 1)
+        hi = np.maximum(np.ceil(e[1:]).astype(np.int64), lo + 1)
+        return lo, hi
+    y0, y1 = edges(rows, h)
+    x0, x1 = edges(cols, w)
+    total = sat[y1][:, x1] - sat[y0][:, x1] - sat[y1][:, x0] + sat[y0][:, x0]
+    return total / ((y1 - y0)[:, None] * (x1 - x0)[None, :])
+
+class ImageSource:
+    # one decoded image; levels() is the fast path called on every preview update
+    def __init__(self, path: str):
+        if Image is None: raise RuntimeError("Image import needs Pillow (pip install pillow)")
+        with Image.open(path) as im:
+            im = im.convert("LA")
+            self.size = im.size
+            self.lum, self.alpha = (b.copy() for b in im.split())
+        self._cells = {}
+
+    def ink(self, invert: bool):
+        if np is not None:
+            lum = np.asarray(self.lum, dtype=np.float32) / 255.0
+            alpha = np.asarray(self.alpha, dtype=np.float32) / 255.0
+            return (lum if invert else 1.0 - lum) * alpha
+        from PIL import ImageChops
+        return ImageChops.multiply(self.lum if invert else ImageChops.invert(self.lum), self.alpha)
+
+    def cells(self, rows: int, cols: int, invert: bool = False, fit: bool = True):
+        # ink per cell in 0..1 as rows × width (width = cols, or less with fit=True), cached
+        key = (rows, cols, invert, fit)
+        if key not in self._cells:
+            width = fit_width(*self.size, rows, cols) if fit else cols
+            ink = self.ink(invert)
+            if np is not None:
+                self._cells[key] = box_resample(ink, rows, width)
+            else:
+                small = ink.resize((width, rows), Image.BOX)
+                data = list(small.getdata())
+                self._cells[key] = [[v / 255.0 for v in data[y*width:(y+1)*width]] for y in range(rows)]
+        return self._cells[key]
+
+    def levels(self, rows: int, cols: int, thresholds=DEFAULT_THRESHOLDS, dither: bool = False,
+               invert: bool = False, fit: bool = True, offset: int = None):
+        # rows × cols grid of levels 0..4; with fit=True the art is centred (or placed at column `offset`)
+        thresholds = sorted(thresholds)
+        cells = self.cells(rows, cols, invert, fit)
+        width = len(cells[0])
+        x0 = (cols - width) // 2 if offset is None else max(0, min(cols - width, offset))
+        out = [[0] * cols for _ in range(rows)]
+        if np is not None:
+            q = quantize(cells, thresholds, dither)
+            for y in range(rows): out[y][x0:x0 + width] = q[y].tolist()
+            return out
+        for y in range(rows):
+            for x in range(width):
+                v = cells[y][x]
+                if dither: v += (BAYER4[y % 4][x % 4] + 0.5) / 16 * _step(thresholds) - _step(thresholds) / 2
+                out[y][x0 + x] = sum(v >= t for t in thresholds)
+        return out
+
+def _step(thresholds) -> float:
+    return (thresholds[-1] - thresholds[0]) / max(1, len(thresholds) - 1) if len(thresholds) > 1 else 0.25
+
+def quantize(cells, thresholds=DEFAULT_THRESHOLDS, dither: bool = False):
+    # ink array -> level array (thresholds ascending); ordered dithering nudges each cell by up to ±half a level step
+    v = np.asarray(cells, dtype=np.float64)
+    if dither:
+        h, w = v.shape
+        bayer = (np.array(BAYER4, dtype=np.float64) + 0.5) / 16 - 0.5
+        v = v + np.tile(bayer, (h // 4 + 1, w // 4 + 1))[:h, :w] * _step(thresholds)
+    return np.searchsorted(np.asarray(thresholds, dtype=np.float64), v, side="right").astype(np.int8)
@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from core import (calc_range_current, calc_range_for_year, calc_range_span, resolve_identity,
+                  parse_range, pattern_for_run, Density, PixelJob, PushPacer, RunTrace)
+
+# Fan-out runner: many (repo, remote, token, identity, pattern, period) jobs on a bounded pool.
+#
+#   python jobs.py manifest.json --workers 8 --per-remote 2 --results results.json
+#
+# Manifest: a JSON list of jobs, or {"defaults": {...}, "jobs": [...]}. Job keys mirror cli.py flags:
+#   repo, remote, pattern (required: text/.gpat file or gpat: share string); token | token_env, name, email, year | years ("2020-2024"), levels | range, seed,
+#   init, safe_mode, batch_weeks, batch_delay, pipeline, journal, delta, repack, sync, sync_depth,
+#   content, fast_import, force_with_lease, label,
+#   adaptive, min_delay, max_delay, batch_commits, max_batch_mb, trace, profile, verify
+#
+# --trace-dir writes one JSON trace per job (<label>.json) unless the job sets its own "trace" path.
+# --per-remote caps the jobs pushing to the same remote repository at once. Jobs that share a local
+# repo run one after another in manifest order (each run points origin at its own remote).
+#
+# Work is git subprocesses and network I/O, so threads are enough; each PixelJob has its own Repo.
+
+def load_manifest(path: str):
+    with open(path, "r", encoding="utf-8") as f: data = json.load(f)
+    if isinstance(data, list): data = {"jobs": data}
+    defaults = data.get("defaults", {})
+    entries = [{**defaults, **job} for job in data.get("jobs", [])]
+    seen = set()
+    for i, e in enumerate(entries):
+        missing = [k for k in ("repo", "remote", "pattern") if not e.get(k)]
+        if missing: raise ValueError(f"job #{i+1}: missing {', '.join(missing)}")
+        e.setdefault("label", os.path.basename(os.path.normpath(e["repo"])) or f"job{i+1}")
+        if e["label"] in seen: e["label"] = f"{e['label']}#{i+1}"
+        seen.add(e["label"])
+    return entries
+
+def remote_key(url: str) -> str:
+    # concurrency bucket: the remote repository (credentials, host case and a trailing .git ignored),
+    # the absolute path for local ones
+    u = urlparse(url)
+    if not u.netloc: return os.path.abspath(url)
+    path = u.path.rstrip("/")
+    if path.endswith(".git"): path = path[:-4]
+    return u.netloc.rsplit("@", 1)[-1].lower() + path
+
+class JobRunner:
+    def __init__(self, entries, workers=4, per_remote=2, status=None, trace_dir=None):
+        self.entries = entries
+        self.trace_dir = trace_dir
+        self.workers, self.per_remote = max(1, workers), max(1, per_remote)
+        self.status = status or (lambda text: None)
+        self.lock = threading.Lock()
+        self.limits = {}
+        self.jobs = {}
+        self.finished = 0
+        self.last_report = 0.0
+
+    def limit(self, remote: str) -> threading.Semaphore:
+        with self.lock:
+            return self.limits.setdefault(remote_key(remote), threading.Semaphore(self.per_remote))
+
+    def report(self, label: str, text: str, force=False):
+        with self.lock:
+            self.status(f"[{label}] {text}")
+            now = time.monotonic()
+            if not force and now - self.last_report < 1.0: return
+            self.last_report = now
+            counters = [j.counter for j in self.jobs.values() if j.counter]
+            done  = sum(c["done"] for c in counters)
+            total = sum(c["total"] for c in counters)
+            self.status(f"== jobs {self.finished}/{len(self.entries)} finished, commits {done}/{total}")
+
+    def build(self, e) -> PixelJob:
+        token = e.get("token") or (os.environ.get(e["token_env"]) if e.get("token_env") else None)
+        if not os.path.isdir(os.path.join(e["repo"], ".git")):
+            if not e.get("init"): raise ValueError(f"{e['repo']} is not a git repository (set \"init\": true)")
+            from git import Repo
+            Repo.init(e["repo"])
+        name, email = resolve_identity(token, e.get("name"), e.get("email"))
+        if e.get("years"):  start, end = calc_range_span(*parse_range(str(e["years"])))
+        elif e.get("year"): start, end = calc_range_for_year(int(e["year"]))
+        else:               start, end = calc_range_current()
+        grid, start, own_density = pattern_for_run(e["pattern"], start, end, bool(e.get("year") or e.get("years")))
+        if own_density and not (e.get("levels") or e.get("range")): density = own_density
+        else: density = Density.from_spec(e.get("levels", "1,3,6,10"), e.get("range"))
+        label = e["label"]
+        pacer = PushPacer(e.get("min_delay", 0), e.get("max_delay", 60), e.get("batch_commits", 200),
+                          max_bytes=int(e.get("max_batch_mb", 32) * 2**20)) if e.get("adaptive") else None
+        trace_path = e.get("trace") or (os.path.join(self.trace_dir, f"{label}.json") if self.trace_dir else None)
+        return PixelJob(os.path.abspath(e["repo"]), e["remote"], token, grid, start, density,
+                        name=name, email=email, safe_mode=e.get("safe_mode", True),
+                        batch_weeks=e.get("batch_weeks", 2), batch_delay=e.get("batch_delay", 5),
+                        fast_import=e.get("fast_import", True), content_mode=e.get("content", "rotate"),
+                        seed=e.get("seed"), pipeline=e.get("pipeline", True), journal=e.get("journal", True),
+                        delta=e.get("delta", False), repack=e.get("repack", True),
+                        sync=e.get("sync", "branch"), sync_depth=e.get("sync_depth", 50), pacer=pacer,
+                        trace=RunTrace(trace_path, e.get("profile")), verify=bool(e.get("verify")),
+                        status=lambda text: self.report(label, text),
+                        confirm=lambda title, question: bool(e.get("force_with_lease")))
+
+    def run_one(self, e):
+        t0 = time.monotonic()
+        result = {"label": e["label"], "repo": e["repo"], "remote": e["remote"], "ok": False, "commits": 0}
+        try:
+            with self.limit(e["remote"]):
+                job = self.build(e)
+                with self.lock: self.jobs[e["label"]] = job
+                result["commits"] = job.run()
+                if job.last_plan: result["seed"] = job.last_plan.seed
+                if job.trace.path: result["trace"] = job.trace.path
+                if job.last_check:
+                    result["verified"] = job.last_check.ok
+                    if not job.last_check.ok: raise RuntimeError(job.last_check.summary())
+            result["ok"] = True
+        except Exception as ex:
+            result["error"] = str(ex)
+        result["seconds"] = round(time.monotonic() - t0, 2)
+        with self.lock: self.finished += 1
+        self.report(e["label"], "ok" if result["ok"] else f"FAILED: {result['error']}", force=True)
+        return result
+
+    def run_group(self, group):
+        # jobs sharing one working tree, one after another in manifest order
+        return [self.run_one(e) for e in group]
+
+    def run(self):
+        results, groups = [], {}
+        for e in self.entries: groups.setdefault(os.path.abspath(e["repo"]), []).append(e)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self.run_group, group) for group in groups.values()]
+            for f in as_completed(futures): results.extend(f.result())
+        order = {e["label"]: i for i, e in enumerate(self.entries)}
+        return sorted(results, key=lambda r: order[r["label"]])
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="jobs.py", description="Run many pixel-art jobs from a manifest.")
+    p.add_argument("manifest", help="JSON manifest (list of jobs or {defaults, jobs})")
+    p.add_argument("--workers", type=int, default=4, help="jobs running at once")
+    p.add_argument("--per-remote", type=int, default=2, help="jobs at once against the same remote repository")
+    p.add_argument("--results", help="write per-job results as JSON here")
+    p.add_argument("--trace-dir", help="write a JSON trace per job (<label>.json) into this folder")
+    p.add_argument("-q", "--quiet", action="store_true")
+    args = p.parse_args(argv)
+    try:
+        entries = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr); return 2
+    status = (lambda text: None) if args.quiet else (lambda text: print(text, file=sys.stderr))
+    results = JobRunner(entries, args.workers, args.per_remote, status, args.trace_dir).run()
+    for r in results:
+        line = f"{'OK  ' if r['ok'] else 'FAIL'} {r['label']}: {r['commits']} commits in {r['seconds']}s"
+        print(line + ("" if r["ok"] else f" — {r['error']}"))
+    if args.results:
+        with open(args.results, "w", encoding="utf-8") as f: json.dump(results, f, indent=2)
+    return 0 if all(r["ok"] for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
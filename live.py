@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import signal
+import argparse
+import tempfile
+import threading
+import datetime as dt
+from core import (CONTENT_MODES, SYNC_MODES, calc_range_current, sunday_of_week, span_weeks, resolve_identity,
+                  read_pattern, Density, GridStore, PixelJob, RunTrace)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Live mode: instead of backdating a whole period at once, a small long-running scheduler commits
+# each day's cell on that day.
+#
+#   python live.py --pattern heart.gpat --repo ./art --remote https://github.com/me/art.git --token $GITHUB_TOKEN
+#
+# Once a day (at --at, local time) it looks up today's level in the pattern and pushes that day's
+# commits. The pattern sits where the GUI's "current" period puts it: a .gpat file keeps its own
+# start, and a text pattern starts at the first week of the current period on the first run. With
+# --loop (the default) it repeats after its last week. Days missed while the scheduler was down are
+# caught up (at most --catch-up days back). The run is a delta run, so a day that already has its
+# commits is left alone, even after a crash between commit and push.
+# Progress lives in .git/pixel-art-live and a lock file next to it keeps a second instance off the repo.
+
+STATE_NAME = "pixel-art-live"
+CHECK_SECONDS = 300         # longest single sleep; the wall clock is re-read after each (suspend, DST)
+
+class RepoLock:
+    # one scheduler per repository: an exclusive non-blocking OS lock, dropped by the OS if we die
+    def __init__(self, git_dir: str):
+        self.path = os.path.join(git_dir, STATE_NAME + ".lock")
+        self.f = None
+
+    def acquire(self):
+        f = open(self.path, "a+")
+        try:
+            if fcntl: fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else: f.seek(0); msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.seek(0); owner = f.read().strip() or "?"; f.close()
+            raise RuntimeError(f"another live scheduler (pid {owner}) is running for this repository")
+        f.seek(0); f.truncate(); f.write(str(os.getpid())); f.flush()
+        self.f = f
+        return self
+
+    def release(self):
+        if self.f: self.f.close(); self.f = None
+
+class LiveState:
+    # {"anchor": first day of a text pattern, "last": last day done}, rewritten atomically
+    def __init__(self, git_dir: str):
+        self.path = os.path.join(git_dir, STATE_NAME)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f: data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.anchor = dt.date.fromisoformat(data["anchor"]) if data.get("anchor") else None
+        self.last = dt.date.fromisoformat(data["last"]) if data.get("last") else None
+
+    def save(self):
+        data = {"anchor": str(self.anchor) if self.anchor else None, "last": str(self.last) if self.last else None}
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f: json.dump(data, f)
+        os.replace(tmp, self.path)
+
+def due_days(last: dt.date, today: dt.date, catch_up: int):
+    # days still to paint: after the last one done, through today, no further back than catch_up days
+    first = today if last is None else last + dt.timedelta(days=1)
+    first = max(first, today - dt.timedelta(days=max(0, catch_up)))
+    return [first + dt.timedelta(days=i) for i in range((today - first).days + 1)]
+
+def level_on(grid: GridStore, day: dt.date, loop: bool):
+    # the pattern's level for `day`; None once a non-looping pattern is over. A pattern is whole weeks,
+    # so repeating it keeps every cell on its weekday
+    i = (day - grid.start).days
+    if i < 0: return 0
+    if i >= len(grid.data):
+        if not loop: return None
+        i %= len(grid.data)
+    return grid.data[i]
+
+def next_run(now: dt.datetime, at: dt.time) -> dt.datetime:
+    run = dt.datetime.combine(now.date(), at)
+    return run if run > now else run + dt.timedelta(days=1)
+
+class LiveScheduler:
+    def __init__(self, args, status):
+        self.args, self.status = args, status
+        self.repo = os.path.abspath(args.repo)
+        self.git_dir = os.path.join(self.repo, ".git")
+        self.state = LiveState(self.git_dir)
+        self.stop = threading.Event()
+        self.name = self.email = None
+
+    def load_pattern(self):
+        # re-read on every cycle, so edits to the pattern file apply from the next day on
+        grid, start, density = read_pattern(self.args.pattern)
+        if start is None:
+            if self.state.anchor is None:
+                self.state.anchor = calc_range_current()[0]; self.state.save()
+            grid = GridStore.from_rows(grid, self.state.anchor)
+        if self.args.levels or self.args.range_ or density is None:
+            density = Density.from_spec(self.args.levels or "1,3,6,10", self.args.range_)
+        return grid, density
+
+    def cycle(self, today: dt.date) -> bool:
+        # paint the due days in one delta run; False once a non-looping pattern has ended
+        grid, density = self.load_pattern()
+        days = due_days(self.state.last, today, self.args.catch_up)
+        if not days: return True
+        start = sunday_of_week(days[0])
+        store, finished = GridStore(start, span_weeks(start, days[-1])), False
+        for day in days:
+            level = level_on(grid, day, self.args.loop)
+            if level is None: finished = True; break
+            store.data[(day - start).days] = level
+        if any(store.data):
+            a = self.args
+            trace = RunTrace(os.path.join(a.trace_dir, f"{today}.json")) if a.trace_dir else None
+            job = PixelJob(self.repo, a.remote, a.token, store, start, density, name=self.name, email=self.email,
+                           safe_mode=False, fast_import=a.fast_import, content_mode=a.content,
+                           seed=(a.seed or 0) ^ days[-1].toordinal(), journal=False, delta=True,
+                           sync=a.sync, trace=trace, status=self.status,
+                           confirm=lambda title, question: a.force_with_lease)
+            job.run()
+        else:
+            self.status(f"{days[-1]}: nothing to paint.")
+        self.state.last = days[-1]; self.state.save()
+        return not finished
+
+    def run(self):
+        at = dt.time.fromisoformat(self.args.at)
+        while not self.stop.is_set():
+            try:
+                if not (self.name and self.email):       # looked up here so a failing token lookup is retried too
+                    self.name, self.email = resolve_identity(self.args.token, self.args.name, self.args.email)
+                if not self.cycle(dt.date.today()):
+                    self.status("Pattern finished (no --loop); stopping."); return 0
+            except Exception as e:
+                self.status(f"error: {e}; retrying in {self.args.retry_minutes} min")
+                if self.args.once: return 1
+                self.stop.wait(self.args.retry_minutes * 60); continue
+            if self.args.once: return 0
+            wake = next_run(dt.datetime.now(), at)
+            self.status(f"Next run {wake:%Y-%m-%d %H:%M}.")
+            while not self.stop.is_set() and dt.datetime.now() < wake:
+                self.stop.wait(min(CHECK_SECONDS, max(1.0, (wake - dt.datetime.now()).total_seconds())))
+        return 0
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="live.py", description="Commit each day's cell of a pattern on that day.")
+    p.add_argument("--pattern", required=True, help="text pattern file, .gpat file or gpat: share string")
+    p.add_argument("--repo", required=True, help="local repository path")
+    p.add_argument("--remote", required=True, help="HTTPS remote URL, e.g. https://github.com/OWNER/REPO.git")
+    p.add_argument("--token", default=os.environ.get("GITHUB_TOKEN"), help="personal access token (default: $GITHUB_TOKEN)")
+    p.add_argument("--name", help="commit author name (default: login from token)")
+    p.add_argument("--email", help="commit author email (default: no-reply email from token)")
+    dens = p.add_mutually_exclusive_group()
+    dens.add_argument("--levels", help="fixed commits per level L1..L4 (default: the pattern's, else 1,3,6,10)")
+    dens.add_argument("--range", dest="range_", metavar="N|M-N", help="range mode instead of fixed level counts")
+    p.add_argument("--at", default="00:10", help="local time of the daily run (HH:MM)")
+    p.add_argument("--catch-up", type=int, default=7, help="days back to fill in after downtime")
+    p.add_argument("--no-loop", dest="loop", action="store_false", help="stop after the pattern's last week")
+    p.add_argument("--once", action="store_true", help="paint the due days and exit (for cron / systemd timers)")
+    p.add_argument("--retry-minutes", type=float, default=15, help="wait after a failed run")
+    p.add_argument("--seed", type=int, help="seed for range-mode commit counts")
+    p.add_argument("--content", choices=CONTENT_MODES, default="rotate", help="what each commit writes")
+    p.add_argument("--no-fast-import", dest="fast_import", action="store_false", help="per-commit git add/commit fallback")
+    p.add_argument("--sync", choices=SYNC_MODES, default="branch", help="remote sync before each run")
+    p.add_argument("--trace-dir", help="write a JSON trace per run (<date>.json) into this folder")
+    p.add_argument("--force-with-lease", action="store_true", help="answer yes if the remote is ahead")
+    p.add_argument("-q", "--quiet", action="store_true")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        dt.time.fromisoformat(args.at)
+        read_pattern(args.pattern)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr); return 2
+    if not os.path.isdir(os.path.join(args.repo, ".git")):
+        print(f"error: {args.repo} is not a git repository", file=sys.stderr); return 2
+
+    def status(text):
+        if not args.quiet: print(f"{dt.datetime.now():%Y-%m-%d %H:%M:%S} {text}", file=sys.stderr, flush=True)
+    scheduler = LiveScheduler(args, status)
+    try:
+        lock = RepoLock(scheduler.git_dir).acquire()
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr); return 2
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: scheduler.stop.set())
+    try:
+        return scheduler.run()
+    finally:
+        lock.release()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+from collections import deque
+
+# Shape tools: the (y, x) cells of a line, a rectangle and a flood fill on the ROWS × weeks grid.
+# Everything here is pure geometry; the canvas applies the result to the grid in one edit and
+# recolours only those cells.
+
+SHAPES = ("brush", "line", "rect", "box", "fill")    # box = rectangle outline
+
+def line_cells(y0: int, x0: int, y1: int, x1: int):
+    # Bresenham from (y0, x0) to (y1, x1), both ends included
+    dx, dy = abs(x1 - x0), -abs(y1 - y0)
+    sx, sy = (1 if x1 >= x0 else -1), (1 if y1 >= y0 else -1)
+    err, cells = dx + dy, []
+    while True:
+        cells.append((y0, x0))
+        if (y0, x0) == (y1, x1): return cells
+        e2 = 2 * err
+        if e2 >= dy: err += dy; x0 += sx
+        if e2 <= dx: err += dx; y0 += sy
+
+def rect_cells(y0: int, x0: int, y1: int, x1: int, filled: bool = True):
+    # cells of the rectangle spanned by two corners (any order); outline only with filled=False
+    (ya, yb), (xa, xb) = sorted((y0, y1)), sorted((x0, x1))
+    if filled or yb - ya < 2 or xb - xa < 2:
+        return [(y, x) for x in range(xa, xb + 1) for y in range(ya, yb + 1)]
+    edges = [(y, x) for x in range(xa, xb + 1) for y in (ya, yb)]
+    return edges + [(y, x) for x in (xa, xb) for y in range(ya + 1, yb)]
+
+def flood_cells(data, rows: int, y: int, x: int):
+    # 4-connected region of equal level around (y, x); data is the grid's column-major level buffer
+    # (slot = x*rows + y). Breadth-first over slots with a deque, each slot visited once
+    start = x * rows + y
+    target, n = data[start], len(data)
+    seen = bytearray(n); seen[start] = 1
+    todo, cells = deque((start,)), []
+    while todo:
+        s = todo.popleft()
+        cells.append((s % rows, s // rows))
+        row = s % rows
+        for t in (s - 1 if row else -1, s + 1 if row < rows - 1 else -1, s - rows, s + rows):
+            if 0 <= t < n and not seen[t] and data[t] == target:
+                seen[t] = 1; todo.append(t)
+    return cells